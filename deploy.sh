@@ -61,6 +61,7 @@ cdk deploy --require-approval never --outputs-file outputs.json
 echo "🔧 Extrayendo configuración..."
 BEDROCK_AGENT_ROLE_ARN=$(cat outputs.json | jq -r '.NoviPqrStack.BedrockAgentRoleArn')
 API_URL=$(cat outputs.json | jq -r '.NoviPqrStack.ApiUrl')
+WEBSOCKET_URL=$(cat outputs.json | jq -r '.NoviPqrStack.WebSocketUrl')
 
 if [ "$BEDROCK_AGENT_ROLE_ARN" = "null" ]; then
     echo "❌ Error: No se pudo obtener el ARN del rol de Bedrock Agent"
@@ -84,11 +85,21 @@ fi
 
 # 8. Actualizar configuración de Lambda
 echo "⚙️ Actualizando configuración de Lambda..."
-aws lambda update-function-configuration \
-  --function-name novi-invoke-agent \
-  --handler invoke_agent.handler \
-  --environment "Variables={BEDROCK_AGENT_ID=$AGENT_ID,BEDROCK_AGENT_ALIAS_ID=$ALIAS_ID,REGION=us-west-2}" \
-  --region us-west-2 > /dev/null
+# Conservar las variables definidas por CDK (tablas, límites) y sólo reemplazar el agente
+# (invoke-agent para REST y websocket-chat para el chat WebSocket)
+for FUNCTION_NAME in novi-invoke-agent novi-websocket-chat; do
+  LAMBDA_ENV=$(aws lambda get-function-configuration \
+    --function-name $FUNCTION_NAME \
+    --region us-west-2 \
+    --query 'Environment' --output json \
+    | jq -c --arg agent "$AGENT_ID" --arg alias "$ALIAS_ID" \
+      '.Variables.BEDROCK_AGENT_ID = $agent | .Variables.BEDROCK_AGENT_ALIAS_ID = $alias')
+
+  aws lambda update-function-configuration \
+    --function-name $FUNCTION_NAME \
+    --environment "$LAMBDA_ENV" \
+    --region us-west-2 > /dev/null
+done
 
 # 9. Crear Action Groups
 echo "🔗 Configurando Action Groups..."
@@ -124,6 +135,7 @@ echo "📋 Configuración final:"
 echo "  Agent ID: $AGENT_ID"
 echo "  Alias ID: $ALIAS_ID"
 echo "  API URL: $API_URL"
+echo "  WebSocket URL: $WEBSOCKET_URL"
 echo ""
 echo "🧪 Comando de prueba:"
 echo "curl -X POST ${API_URL}agent \\"
@@ -2,8 +2,15 @@ import * as cdk from 'aws-cdk-lib';
 import * as dynamodb from 'aws-cdk-lib/aws-dynamodb';
 import * as lambda from 'aws-cdk-lib/aws-lambda';
 import * as apigateway from 'aws-cdk-lib/aws-apigateway';
+import * as apigwv2 from 'aws-cdk-lib/aws-apigatewayv2';
+import * as apigwv2Integrations from 'aws-cdk-lib/aws-apigatewayv2-integrations';
+import * as apigwv2Authorizers from 'aws-cdk-lib/aws-apigatewayv2-authorizers';
+import * as secretsmanager from 'aws-cdk-lib/aws-secretsmanager';
 import * as iam from 'aws-cdk-lib/aws-iam';
 import * as s3 from 'aws-cdk-lib/aws-s3';
+import * as sqs from 'aws-cdk-lib/aws-sqs';
+import * as cloudwatch from 'aws-cdk-lib/aws-cloudwatch';
+import * as lambdaEventSources from 'aws-cdk-lib/aws-lambda-event-sources';
 import { Construct } from 'constructs';
 
 export class NoviPqrStack extends cdk.Stack {
@@ -15,9 +22,69 @@ export class NoviPqrStack extends cdk.Stack {
       tableName: 'novi-pqr-table',
       partitionKey: { name: 'pqr_id', type: dynamodb.AttributeType.STRING },
       billingMode: dynamodb.BillingMode.PAY_PER_REQUEST,
+      // Las PQRs resueltas reciben expires_at y pasan al archivo frío al expirar
+      timeToLiveAttribute: 'expires_at',
+      stream: dynamodb.StreamViewType.NEW_AND_OLD_IMAGES,
       removalPolicy: cdk.RemovalPolicy.DESTROY,
     });
 
+    // Bucket S3 para el archivo frío de PQRs resueltas (JSON Lines comprimido)
+    const archiveBucket = new s3.Bucket(this, 'PqrArchiveBucket', {
+      blockPublicAccess: s3.BlockPublicAccess.BLOCK_ALL,
+      encryption: s3.BucketEncryption.S3_MANAGED,
+      lifecycleRules: [{
+        transitions: [{
+          storageClass: s3.StorageClass.INFREQUENT_ACCESS,
+          transitionAfter: cdk.Duration.days(30),
+        }],
+      }],
+      removalPolicy: cdk.RemovalPolicy.RETAIN,
+    });
+
+    // Tabla DynamoDB para contadores de admisión (rate limit por sesión y concurrencia global)
+    const admissionTable = new dynamodb.Table(this, 'AdmissionTable', {
+      tableName: 'novi-admission-table',
+      partitionKey: { name: 'pk', type: dynamodb.AttributeType.STRING },
+      billingMode: dynamodb.BillingMode.PAY_PER_REQUEST,
+      timeToLiveAttribute: 'expires_at',
+      removalPolicy: cdk.RemovalPolicy.DESTROY,
+    });
+
+    // Tabla DynamoDB para jobs asíncronos de /agent (resultados con TTL)
+    const jobsTable = new dynamodb.Table(this, 'AgentJobsTable', {
+      tableName: 'novi-agent-jobs-table',
+      partitionKey: { name: 'job_id', type: dynamodb.AttributeType.STRING },
+      billingMode: dynamodb.BillingMode.PAY_PER_REQUEST,
+      timeToLiveAttribute: 'expires_at',
+      removalPolicy: cdk.RemovalPolicy.DESTROY,
+    });
+
+    // Tabla DynamoDB para transcripciones de conversaciones (revisión de calidad)
+    const transcriptsTable = new dynamodb.Table(this, 'TranscriptsTable', {
+      tableName: 'novi-transcripts-table',
+      partitionKey: { name: 'session_id', type: dynamodb.AttributeType.STRING },
+      sortKey: { name: 'turn_id', type: dynamodb.AttributeType.STRING },
+      billingMode: dynamodb.BillingMode.PAY_PER_REQUEST,
+      timeToLiveAttribute: 'expires_at',
+      removalPolicy: cdk.RemovalPolicy.DESTROY,
+    });
+
+    // Tabla DynamoDB para el registro de conexiones WebSocket (TTL por si se pierde el $disconnect)
+    const connectionsTable = new dynamodb.Table(this, 'ConnectionsTable', {
+      tableName: 'novi-connections-table',
+      partitionKey: { name: 'connection_id', type: dynamodb.AttributeType.STRING },
+      billingMode: dynamodb.BillingMode.PAY_PER_REQUEST,
+      timeToLiveAttribute: 'expires_at',
+      removalPolicy: cdk.RemovalPolicy.DESTROY,
+    });
+
+    // Índice por cliente para enviar cambios de estado de sus PQRs
+    connectionsTable.addGlobalSecondaryIndex({
+      indexName: 'customer_email-index',
+      partitionKey: { name: 'customer_email', type: dynamodb.AttributeType.STRING },
+      projectionType: dynamodb.ProjectionType.KEYS_ONLY,
+    });
+
     // Bucket S3 para FAQs (referencia al existente)
     const faqsBucket = s3.Bucket.fromBucketName(this, 'FaqsBucket', 'novi-pqr-faqs-bucket');
 
@@ -34,7 +101,25 @@ export class NoviPqrStack extends cdk.Stack {
             new iam.PolicyStatement({
               effect: iam.Effect.ALLOW,
               actions: ['dynamodb:GetItem', 'dynamodb:PutItem', 'dynamodb:UpdateItem'],
-              resources: [pqrTable.tableArn],
+              resources: [pqrTable.tableArn, admissionTable.tableArn, jobsTable.tableArn],
+            }),
+            // DynamoDB: escritura en lote de transcripciones
+            new iam.PolicyStatement({
+              effect: iam.Effect.ALLOW,
+              actions: ['dynamodb:BatchWriteItem', 'dynamodb:PutItem'],
+              resources: [transcriptsTable.tableArn],
+            }),
+            // DynamoDB: registro de conexiones WebSocket
+            new iam.PolicyStatement({
+              effect: iam.Effect.ALLOW,
+              actions: ['dynamodb:GetItem', 'dynamodb:PutItem', 'dynamodb:DeleteItem', 'dynamodb:Query'],
+              resources: [connectionsTable.tableArn, `${connectionsTable.tableArn}/index/*`],
+            }),
+            // Lambda: invoke-agent se invoca a sí misma en modo Event para los jobs asíncronos
+            new iam.PolicyStatement({
+              effect: iam.Effect.ALLOW,
+              actions: ['lambda:InvokeFunction'],
+              resources: [`arn:aws:lambda:${this.region}:${this.account}:function:novi-invoke-agent`]
             }),
             // Bedrock
             new iam.PolicyStatement({
@@ -51,6 +136,12 @@ export class NoviPqrStack extends cdk.Stack {
               effect: iam.Effect.ALLOW,
               actions: ['s3:GetObject', 's3:ListBucket'],
               resources: [faqsBucket.bucketArn, `${faqsBucket.bucketArn}/*`]
+            }),
+            // S3 archivo frío de PQRs
+            new iam.PolicyStatement({
+              effect: iam.Effect.ALLOW,
+              actions: ['s3:GetObject', 's3:PutObject', 's3:ListBucket'],
+              resources: [archiveBucket.bucketArn, `${archiveBucket.bucketArn}/*`]
             })
           ],
         }),
@@ -90,11 +181,89 @@ export class NoviPqrStack extends cdk.Stack {
       role: lambdaRole,
       environment: {
         'PQR_TABLE_NAME': pqrTable.tableName,
+        'ARCHIVE_BUCKET_NAME': archiveBucket.bucketName,
+        // PQRs creadas por sesión para los turnos siguientes
+        'SESSION_CONTEXT_TABLE_NAME': admissionTable.tableName,
         'REGION': 'us-west-2'
       },
       timeout: cdk.Duration.seconds(30),
     });
 
+    // Lambda: pqr-lifecycle (stream de PqrTable: TTL de resueltas y archivo en S3)
+    const pqrLifecycleLambda = new lambda.Function(this, 'PqrLifecycleFunction', {
+      functionName: 'novi-pqr-lifecycle',
+      runtime: lambda.Runtime.PYTHON_3_12,
+      handler: 'pqr_lifecycle.handler',
+      code: lambda.Code.fromAsset('../lambda-functions', {
+        bundling: {
+          image: lambda.Runtime.PYTHON_3_12.bundlingImage,
+          command: [
+            'bash', '-c',
+            'cp -r /asset-input/* /asset-output/ && pip install --no-cache-dir -r /asset-output/requirements.txt -t /asset-output/ || echo "No requirements.txt found"'
+          ],
+        },
+      }),
+      role: lambdaRole,
+      environment: {
+        'PQR_TABLE_NAME': pqrTable.tableName,
+        'ARCHIVE_BUCKET_NAME': archiveBucket.bucketName,
+        'PQR_ARCHIVE_AFTER_DAYS': '30',
+        'REGION': 'us-west-2'
+      },
+      timeout: cdk.Duration.seconds(60),
+    });
+
+    // Lotes que agotan los reintentos: el item ya fue borrado por TTL, así que sin
+    // DLQ la PQR se perdería de ambos tiers. El mensaje indica el rango del shard
+    // a reprocesar (el stream retiene los registros 24h).
+    const pqrLifecycleDlq = new sqs.Queue(this, 'PqrLifecycleDlq', {
+      queueName: 'novi-pqr-lifecycle-dlq',
+      retentionPeriod: cdk.Duration.days(14),
+      encryption: sqs.QueueEncryption.SQS_MANAGED,
+    });
+
+    pqrLifecycleLambda.addEventSource(new lambdaEventSources.DynamoEventSource(pqrTable, {
+      startingPosition: lambda.StartingPosition.TRIM_HORIZON,
+      batchSize: 100,
+      maxBatchingWindow: cdk.Duration.seconds(60),
+      retryAttempts: 10,
+      // Aislar el registro que falla en lugar de reintentar el lote completo
+      bisectBatchOnError: true,
+      onFailure: new lambdaEventSources.SqsDlq(pqrLifecycleDlq),
+    }));
+
+    new cloudwatch.Alarm(this, 'PqrLifecycleDlqAlarm', {
+      alarmName: 'novi-pqr-lifecycle-dlq-not-empty',
+      alarmDescription: 'Lotes del stream de PQRs sin archivar: reprocesar antes de 24h',
+      metric: pqrLifecycleDlq.metricApproximateNumberOfMessagesVisible({
+        period: cdk.Duration.minutes(1),
+      }),
+      threshold: 1,
+      evaluationPeriods: 1,
+      comparisonOperator: cloudwatch.ComparisonOperator.GREATER_THAN_OR_EQUAL_TO_THRESHOLD,
+      treatMissingData: cloudwatch.TreatMissingData.NOT_BREACHING,
+    });
+
+    // Targets multi-región opcionales: cdk deploy -c bedrockTargets='[{"region":...,"agent_id":...,"alias_id":...}]'
+    const bedrockTargets = this.node.tryGetContext('bedrockTargets');
+
+    // Configuración común de las Lambdas que invocan al agente (REST y WebSocket)
+    const agentEnvironment: { [key: string]: string } = {
+      'BEDROCK_AGENT_ID': 'PLACEHOLDER', // Se actualiza después
+      'BEDROCK_AGENT_ALIAS_ID': 'PLACEHOLDER',
+      'REGION': 'us-west-2',
+      'ADMISSION_TABLE_NAME': admissionTable.tableName,
+      'ADMISSION_SESSION_RATE_PER_SEC': '0.5',
+      'ADMISSION_SESSION_BURST': '5',
+      'ADMISSION_GLOBAL_MAX_CONCURRENCY': '20',
+      'ADMISSION_LEASE_SECONDS': '150',
+      'SESSION_CONTEXT_TABLE_NAME': admissionTable.tableName,
+      'TRANSCRIPTS_TABLE_NAME': transcriptsTable.tableName,
+      'TRANSCRIPT_MAX_BUFFERED': '500',
+      'TRANSCRIPT_DROP_POLICY': 'drop_oldest',
+      ...(bedrockTargets ? { 'BEDROCK_TARGETS': bedrockTargets } : {})
+    };
+
     // Lambda: invoke-agent
     const invokeAgentLambda = new lambda.Function(this, 'InvokeAgentFunction', {
       functionName: 'novi-invoke-agent',
@@ -111,11 +280,19 @@ export class NoviPqrStack extends cdk.Stack {
       }),
       role: lambdaRole,
       environment: {
-        'BEDROCK_AGENT_ID': 'PLACEHOLDER', // Se actualiza después
-        'BEDROCK_AGENT_ALIAS_ID': 'PLACEHOLDER',
-        'REGION': 'us-west-2'
+        ...agentEnvironment,
+        'JOBS_TABLE_NAME': jobsTable.tableName,
+        'JOB_TTL_SECONDS': '3600',
+        'JOB_START_DEADLINE_SECONDS': '420',
+        'SYNC_BUDGET_MS': '26000',
       },
-      timeout: cdk.Duration.seconds(60),
+      // Los jobs asíncronos no están limitados por los 29s de API Gateway
+      timeout: cdk.Duration.seconds(120),
+      // Sin reintentos automáticos: un job fallido queda marcado como ERROR
+      retryAttempts: 0,
+      // Un job que no arranca en 5 min se descarta; get_job lo reporta como ERROR
+      // al vencer JOB_START_DEADLINE_SECONDS (maxEventAge + timeout)
+      maxEventAge: cdk.Duration.minutes(5),
     });
 
     // API Gateway
@@ -132,17 +309,149 @@ export class NoviPqrStack extends cdk.Stack {
     const agentResource = api.root.addResource('agent');
     agentResource.addMethod('POST', new apigateway.LambdaIntegration(invokeAgentLambda));
 
+    // Consulta de jobs asíncronos: GET /agent/jobs/{job_id}
+    const jobResource = agentResource.addResource('jobs').addResource('{job_id}');
+    jobResource.addMethod('GET', new apigateway.LambdaIntegration(invokeAgentLambda));
+
+    // Lambda: websocket-chat (chat por conexión persistente, misma lógica de turno que /agent)
+    const websocketChatLambda = new lambda.Function(this, 'WebSocketChatFunction', {
+      functionName: 'novi-websocket-chat',
+      runtime: lambda.Runtime.PYTHON_3_12,
+      handler: 'websocket_chat.handler',
+      code: lambda.Code.fromAsset('../lambda-functions', {
+        bundling: {
+          image: lambda.Runtime.PYTHON_3_12.bundlingImage,
+          command: [
+            'bash', '-c',
+            'cp -r /asset-input/* /asset-output/ && pip install --no-cache-dir -r /asset-output/requirements.txt -t /asset-output/ || echo "No requirements.txt found"'
+          ],
+        },
+      }),
+      role: lambdaRole,
+      environment: {
+        ...agentEnvironment,
+        'CONNECTIONS_TABLE_NAME': connectionsTable.tableName,
+      },
+      // La integración WebSocket también corta a los 29s, pero la respuesta se envía
+      // con post_to_connection: el turno sigue hasta el timeout de la Lambda y llega
+      // al cliente por la conexión aunque API Gateway registre el timeout
+      timeout: cdk.Duration.seconds(120),
+    });
+
+    // Secreto para firmar los tokens de conexión (los emite el backend que autentica al cliente)
+    const websocketTokenSecret = new secretsmanager.Secret(this, 'WebSocketTokenSecret', {
+      secretName: 'novi-websocket-token-secret',
+      generateSecretString: { passwordLength: 48, excludePunctuation: true },
+    });
+    websocketTokenSecret.grantRead(lambdaRole);
+
+    // Lambda: websocket-authorizer (valida ?token= en $connect y expone el email verificado)
+    const websocketAuthorizerLambda = new lambda.Function(this, 'WebSocketAuthorizerFunction', {
+      functionName: 'novi-websocket-authorizer',
+      runtime: lambda.Runtime.PYTHON_3_12,
+      handler: 'websocket_authorizer.handler',
+      code: lambda.Code.fromAsset('../lambda-functions', {
+        bundling: {
+          image: lambda.Runtime.PYTHON_3_12.bundlingImage,
+          command: [
+            'bash', '-c',
+            'cp -r /asset-input/* /asset-output/ && pip install --no-cache-dir -r /asset-output/requirements.txt -t /asset-output/ || echo "No requirements.txt found"'
+          ],
+        },
+      }),
+      role: lambdaRole,
+      environment: {
+        'WEBSOCKET_TOKEN_SECRET_ARN': websocketTokenSecret.secretArn,
+        'REGION': 'us-west-2'
+      },
+      timeout: cdk.Duration.seconds(10),
+    });
+
+    // API Gateway WebSocket
+    const websocketApi = new apigwv2.WebSocketApi(this, 'NoviChatWebSocketApi', {
+      apiName: 'novi-chat-websocket',
+      description: 'Chat con el agente Novi y notificaciones de estado de PQRs',
+      connectRouteOptions: {
+        integration: new apigwv2Integrations.WebSocketLambdaIntegration('ConnectIntegration', websocketChatLambda),
+        // Sin fuente de identidad obligatoria: sin token la conexión es anónima y no recibe notificaciones
+        authorizer: new apigwv2Authorizers.WebSocketLambdaAuthorizer('ConnectAuthorizer', websocketAuthorizerLambda, {
+          identitySource: [],
+        }),
+      },
+      disconnectRouteOptions: {
+        integration: new apigwv2Integrations.WebSocketLambdaIntegration('DisconnectIntegration', websocketChatLambda),
+      },
+      defaultRouteOptions: {
+        integration: new apigwv2Integrations.WebSocketLambdaIntegration('DefaultIntegration', websocketChatLambda),
+      },
+    });
+
+    const websocketStage = new apigwv2.WebSocketStage(this, 'NoviChatWebSocketStage', {
+      webSocketApi: websocketApi,
+      stageName: 'prod',
+      autoDeploy: true,
+    });
+
+    // Lambda: pqr-status-push (stream de PqrTable: envía cambios de estado a los clientes conectados)
+    const pqrStatusPushLambda = new lambda.Function(this, 'PqrStatusPushFunction', {
+      functionName: 'novi-pqr-status-push',
+      runtime: lambda.Runtime.PYTHON_3_12,
+      handler: 'pqr_status_push.handler',
+      code: lambda.Code.fromAsset('../lambda-functions', {
+        bundling: {
+          image: lambda.Runtime.PYTHON_3_12.bundlingImage,
+          command: [
+            'bash', '-c',
+            'cp -r /asset-input/* /asset-output/ && pip install --no-cache-dir -r /asset-output/requirements.txt -t /asset-output/ || echo "No requirements.txt found"'
+          ],
+        },
+      }),
+      role: lambdaRole,
+      environment: {
+        'CONNECTIONS_TABLE_NAME': connectionsTable.tableName,
+        'WEBSOCKET_ENDPOINT': websocketStage.callbackUrl,
+        'REGION': 'us-west-2'
+      },
+      timeout: cdk.Duration.seconds(30),
+    });
+
+    // Sólo modificaciones: las altas y los borrados por TTL no son cambios de estado
+    pqrStatusPushLambda.addEventSource(new lambdaEventSources.DynamoEventSource(pqrTable, {
+      startingPosition: lambda.StartingPosition.LATEST,
+      batchSize: 100,
+      retryAttempts: 2,
+      filters: [lambda.FilterCriteria.filter({ eventName: lambda.FilterRule.isEqual('MODIFY') })],
+    }));
+
+    // post_to_connection para respuestas del chat y notificaciones de estado (rol compartido)
+    websocketStage.grantManagementApiAccess(lambdaRole);
+
     // Outputs
     new cdk.CfnOutput(this, 'ApiUrl', {
       value: api.url,
       description: 'URL de la API'
     });
 
+    new cdk.CfnOutput(this, 'WebSocketUrl', {
+      value: websocketStage.url,
+      description: 'URL del chat WebSocket (wss://)'
+    });
+
+    new cdk.CfnOutput(this, 'WebSocketTokenSecretArn', {
+      value: websocketTokenSecret.secretArn,
+      description: 'Secreto para firmar tokens de conexión WebSocket'
+    });
+
     new cdk.CfnOutput(this, 'TableName', {
       value: pqrTable.tableName,
       description: 'Nombre de la tabla DynamoDB'
     });
 
+    new cdk.CfnOutput(this, 'ArchiveBucketName', {
+      value: archiveBucket.bucketName,
+      description: 'Bucket S3 con el archivo frío de PQRs resueltas'
+    });
+
     new cdk.CfnOutput(this, 'BedrockAgentRoleArn', {
       value: bedrockAgentRole.roleArn,
       description: 'ARN del rol para Bedrock Agent - usar en setup_agent.py'
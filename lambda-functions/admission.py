@@ -0,0 +1,240 @@
+import json
+import os
+import time
+import logging
+import threading
+import uuid
+import boto3
+from collections import OrderedDict
+from botocore.exceptions import BotoCoreError, ClientError
+
+# Configuración de logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Límites de admisión (configurables por variables de entorno)
+SESSION_RATE_PER_SEC = float(os.environ.get('ADMISSION_SESSION_RATE_PER_SEC', '0.5'))
+SESSION_BURST = int(os.environ.get('ADMISSION_SESSION_BURST', '5'))
+GLOBAL_MAX_CONCURRENCY = int(os.environ.get('ADMISSION_GLOBAL_MAX_CONCURRENCY', '20'))
+ADMISSION_TABLE_NAME = os.environ.get('ADMISSION_TABLE_NAME')
+
+# Item único con los leases en curso (lease_id -> epoch de expiración)
+GLOBAL_LEASES_KEY = 'global#leases'
+# Vida máxima de un lease: supera el timeout de la Lambda (120s) para que un
+# lease no liberado (p.ej. timeout) se recupere sin bloquear el presupuesto
+LEASE_SECONDS = int(os.environ.get('ADMISSION_LEASE_SECONDS', '150'))
+# Tiempo que el tier local recuerda que el presupuesto global está agotado
+GLOBAL_SHED_CACHE_SECONDS = 1.0
+# Máximo de sesiones con bucket local en memoria por contenedor
+LOCAL_MAX_SESSIONS = 5000
+
+METRICS_NAMESPACE = 'Novi/Admission'
+
+_lock = threading.Lock()
+_local_buckets = OrderedDict()
+_global_shed_until = 0.0
+_table = None
+
+# Contadores en proceso (también se exportan como métricas EMF)
+stats = {'admitted': 0, 'shed_session': 0, 'shed_global': 0}
+
+
+def _get_table():
+    """Retorna la tabla de admisión o None si no está configurada"""
+    global _table
+    if not ADMISSION_TABLE_NAME:
+        return None
+    if _table is None:
+        dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('REGION', 'us-west-2'))
+        _table = dynamodb.Table(ADMISSION_TABLE_NAME)
+    return _table
+
+
+def _take_local_token(session_id, now):
+    """Token bucket en memoria por sesión. Retorna segundos de espera (0 = admitido)"""
+    with _lock:
+        bucket = _local_buckets.pop(session_id, None)
+        if bucket is None:
+            bucket = {'tokens': float(SESSION_BURST), 'updated': now}
+        else:
+            elapsed = max(0.0, now - bucket['updated'])
+            bucket['tokens'] = min(float(SESSION_BURST), bucket['tokens'] + elapsed * SESSION_RATE_PER_SEC)
+            bucket['updated'] = now
+
+        # Reinsertar al final para mantener orden LRU
+        _local_buckets[session_id] = bucket
+        while len(_local_buckets) > LOCAL_MAX_SESSIONS:
+            _local_buckets.popitem(last=False)
+
+        if bucket['tokens'] >= 1.0:
+            bucket['tokens'] -= 1.0
+            return 0.0
+        return (1.0 - bucket['tokens']) / SESSION_RATE_PER_SEC
+
+
+def _take_shared_token(table, session_id, now):
+    """Contador atómico por sesión en DynamoDB (ventana fija equivalente al bucket).
+
+    La ventana dura SESSION_BURST / SESSION_RATE_PER_SEC segundos y admite
+    SESSION_BURST solicitudes, lo que aproxima el token bucket entre contenedores.
+    Retorna segundos de espera (0 = admitido).
+    """
+    window_seconds = max(1, int(SESSION_BURST / SESSION_RATE_PER_SEC))
+    window = int(now // window_seconds)
+    window_end = (window + 1) * window_seconds
+    try:
+        table.update_item(
+            Key={'pk': f"session#{session_id}#{window}"},
+            UpdateExpression='ADD hits :one SET expires_at = :exp',
+            ConditionExpression='attribute_not_exists(hits) OR hits < :limit',
+            ExpressionAttributeValues={
+                ':one': 1,
+                ':limit': SESSION_BURST,
+                ':exp': window_end + 60
+            }
+        )
+        return 0.0
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+            return window_end - now
+        raise
+
+
+def _reap_expired_leases(table, now):
+    """Elimina los leases vencidos del item global. Retorna True si liberó alguno"""
+    item = table.get_item(Key={'pk': GLOBAL_LEASES_KEY}, ConsistentRead=True).get('Item') or {}
+    expired = [lease_id for lease_id, expires_at in (item.get('leases') or {}).items() if expires_at <= now]
+    if not expired:
+        return False
+
+    names = {f"#l{i}": lease_id for i, lease_id in enumerate(expired)}
+    table.update_item(
+        Key={'pk': GLOBAL_LEASES_KEY},
+        UpdateExpression='REMOVE ' + ', '.join(f"leases.{name}" for name in names),
+        ExpressionAttributeNames=names
+    )
+    logger.warning(f"Leases de concurrencia vencidos recuperados: {len(expired)}")
+    return True
+
+
+def _acquire_global_slot(table, now):
+    """Reserva un lugar del presupuesto global de concurrencia. Retorna el lease_id o None.
+
+    Cada lease es una entrada con su propia expiración en un único item, de modo
+    que el límite acota las solicitudes en curso y no los inicios por minuto.
+    """
+    lease_id = uuid.uuid4().hex
+    for attempt in range(2):
+        try:
+            table.update_item(
+                Key={'pk': GLOBAL_LEASES_KEY},
+                UpdateExpression='SET leases.#lease = :exp',
+                ConditionExpression='attribute_not_exists(leases) OR size(leases) < :limit',
+                ExpressionAttributeNames={'#lease': lease_id},
+                ExpressionAttributeValues={
+                    ':exp': int(now) + LEASE_SECONDS,
+                    ':limit': GLOBAL_MAX_CONCURRENCY
+                }
+            )
+            return lease_id
+        except ClientError as e:
+            code = e.response.get('Error', {}).get('Code')
+            if code == 'ConditionalCheckFailedException':
+                # Presupuesto lleno: reintentar sólo si había leases vencidos
+                if attempt == 0 and _reap_expired_leases(table, now):
+                    continue
+                return None
+            if code == 'ValidationException' and attempt == 0:
+                # Primer uso: el mapa de leases aún no existe
+                table.update_item(
+                    Key={'pk': GLOBAL_LEASES_KEY},
+                    UpdateExpression='SET leases = if_not_exists(leases, :empty)',
+                    ExpressionAttributeValues={':empty': {}}
+                )
+                continue
+            raise
+    return None
+
+
+def _emit_metric(result, reason):
+    """Publica contadores admit/shed en formato CloudWatch EMF"""
+    print(json.dumps({
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': METRICS_NAMESPACE,
+                'Dimensions': [['Reason']],
+                'Metrics': [{'Name': result, 'Unit': 'Count'}]
+            }]
+        },
+        'Reason': reason,
+        result: 1
+    }))
+
+
+def _shed(reason, retry_after):
+    """Registra y construye una decisión de rechazo"""
+    stats[f"shed_{reason}"] += 1
+    _emit_metric('Shed', reason)
+    return {
+        'admitted': False,
+        'reason': reason,
+        'retry_after': max(1, int(retry_after + 0.999)),
+        'lease': None
+    }
+
+
+def admit(session_id):
+    """Decide si una solicitud de /agent entra antes de invocar Bedrock.
+
+    Orden de evaluación: bucket local de la sesión, caché local de saturación
+    global, contador compartido de la sesión y finalmente el presupuesto global
+    en DynamoDB. Si DynamoDB falla se admite (fail-open) para no tumbar el chat.
+    """
+    global _global_shed_until
+    now = time.time()
+
+    wait = _take_local_token(session_id, now)
+    if wait > 0:
+        return _shed('session', wait)
+
+    if now < _global_shed_until:
+        return _shed('global', _global_shed_until - now)
+
+    lease = None
+    table = _get_table()
+    if table is not None:
+        try:
+            wait = _take_shared_token(table, session_id, now)
+            if wait > 0:
+                return _shed('session', wait)
+
+            lease = _acquire_global_slot(table, now)
+            if lease is None:
+                _global_shed_until = now + GLOBAL_SHED_CACHE_SECONDS
+                return _shed('global', GLOBAL_SHED_CACHE_SECONDS)
+        except (ClientError, BotoCoreError) as e:
+            logger.warning(f"Admisión degradada, DynamoDB no disponible: {str(e)}")
+
+    stats['admitted'] += 1
+    _emit_metric('Admitted', 'ok')
+    return {'admitted': True, 'reason': 'ok', 'retry_after': 0, 'lease': lease}
+
+
+def release(decision):
+    """Libera el lugar de concurrencia global reservado por admit()"""
+    if not decision or not decision.get('lease'):
+        return
+    table = _get_table()
+    if table is None:
+        return
+    try:
+        table.update_item(
+            Key={'pk': GLOBAL_LEASES_KEY},
+            UpdateExpression='REMOVE leases.#lease',
+            ExpressionAttributeNames={'#lease': decision['lease']}
+        )
+    except (ClientError, BotoCoreError) as e:
+        # El lease vence solo tras LEASE_SECONDS; no convertir un turno exitoso en error
+        logger.warning(f"No se pudo liberar lease {decision['lease']}: {str(e)}")
+    decision['lease'] = None
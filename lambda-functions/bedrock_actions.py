@@ -2,6 +2,9 @@ import json
 import boto3
 import os
 import time
+import tracing
+import session_context
+import pqr_archive
 
 def handler(event, context):
     """
@@ -33,15 +36,35 @@ def handler(event, context):
         # Combinar parámetros y body
         all_params = {**params_dict, **body_content}
         
+        # Atributos de sesión enviados por invoke_agent (contexto del cliente)
+        session_attributes = event.get('sessionAttributes') or {}
+        prompt_session_attributes = event.get('promptSessionAttributes') or {}
+        
+        # Correlation ID del turno enviado por invoke_agent vía sessionAttributes
+        correlation_id, turn_started_ms = tracing.correlation_from_action_event(event)
+        span_attrs = {'session_id': event.get('sessionId'), 'api_path': api_path}
+        if turn_started_ms:
+            # Tiempo desde el inicio del turno hasta esta tool call (razonamiento del agente)
+            span_attrs['since_turn_start_ms'] = tracing.now_ms() - turn_started_ms
+        
         # Enrutar según la operación
-        if api_path == '/createPQR' and http_method == 'POST':
-            result = create_pqr(all_params)
-        elif api_path == '/checkPQR' and http_method == 'POST':
-            result = check_pqr(all_params)
-        else:
-            result = {
-                'error': f'Operación no soportada: {http_method} {api_path}'
-            }
+        with tracing.span('action', correlation_id, **span_attrs):
+            if api_path == '/createPQR' and http_method == 'POST':
+                result = create_pqr(all_params, session_attributes)
+                if 'pqr_id' in result:
+                    # Guardar la PQR creada para que los siguientes turnos no la pregunten:
+                    # en la tabla (turnos siguientes) y en los atributos (resto de este turno)
+                    session_context.remember_created_pqr(event.get('sessionId'), result['pqr_id'])
+                    session_attributes = session_context.with_created_pqr(session_attributes, result['pqr_id'])
+                    prompt_session_attributes = session_context.with_created_pqr(
+                        prompt_session_attributes, result['pqr_id']
+                    )
+            elif api_path == '/checkPQR' and http_method == 'POST':
+                result = check_pqr(all_params, session_attributes)
+            else:
+                result = {
+                    'error': f'Operación no soportada: {http_method} {api_path}'
+                }
         
         # Formato de respuesta para Bedrock Agent
         return {
@@ -56,7 +79,10 @@ def handler(event, context):
                         'body': json.dumps(result)
                     }
                 }
-            }
+            },
+            # Bedrock reemplaza los atributos de la sesión con los retornados
+            'sessionAttributes': session_attributes,
+            'promptSessionAttributes': prompt_session_attributes
         }
         
     except Exception as e:
@@ -76,9 +102,13 @@ def handler(event, context):
             }
         }
 
-def create_pqr(params):
+def create_pqr(params, session_attributes=None):
     """Crear nueva PQR"""
     try:
+        # Usar el email conocido de la sesión si el agente no lo envió
+        if not params.get('customer_email') and session_attributes:
+            params['customer_email'] = session_attributes.get(session_context.CUSTOMER_EMAIL)
+        
         # Validar parámetros requeridos
         required_fields = ['customer_email', 'description', 'priority', 'category']
         for field in required_fields:
@@ -115,10 +145,13 @@ def create_pqr(params):
         print(f"Error creando PQR: {str(e)}")
         return {'error': 'Error creando PQR'}
 
-def check_pqr(params):
+def check_pqr(params, session_attributes=None):
     """Consultar PQR existente"""
     try:
         pqr_id = params.get('pqr_id')
+        # Sin ID explícito, consultar la última PQR conocida de la sesión
+        if not pqr_id and session_attributes:
+            pqr_id = session_attributes.get(session_context.LAST_PQR_ID)
         if not pqr_id:
             return {'error': 'pqr_id requerido'}
         
@@ -128,17 +161,26 @@ def check_pqr(params):
         
         response = table.get_item(Key={'pqr_id': pqr_id})
         
-        if 'Item' not in response:
+        archived = False
+        item = response.get('Item')
+        if item is None:
+            # PQRs resueltas antiguas sólo existen en el archivo frío (S3)
+            item = pqr_archive.find_pqr(pqr_id)
+            archived = True
+        
+        if item is None:
             return {'error': 'PQR no encontrada'}
         
-        item = response['Item']
-        return {
+        result = {
             'pqr_id': item['pqr_id'],
             'customer_email': item['customer_email'],
             'description': item['description'],
             'status': item['status'],
             'created_at': item['created_at']
         }
+        if archived:
+            result['archived'] = True
+        return result
         
     except Exception as e:
         print(f"Error consultando PQR: {str(e)}")
@@ -0,0 +1,286 @@
+import json
+import os
+import time
+import hashlib
+import logging
+import threading
+import boto3
+from collections import OrderedDict
+from botocore.config import Config
+from botocore.exceptions import ClientError, BotoCoreError
+
+# Configuración de logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Cliente Bedrock Agent Runtime con timeouts amplios (sin reintentos: el pool hace failover)
+bedrock_agent_runtime_config = Config(
+    read_timeout=900,
+    connect_timeout=900,
+    retries={'max_attempts': 0}
+)
+
+# Parámetros de enrutamiento
+EWMA_ALPHA = 0.3
+# Penalización del score por tasa de error (score = latencia * (1 + penalty * error))
+ERROR_PENALTY = 4.0
+# Umbral de tasa de error (EWMA) para expulsar un target temporalmente
+EJECT_ERROR_RATE = 0.5
+EJECT_SECONDS = 30
+# Targets con score hasta este factor del mejor se consideran equivalentes;
+# entre ellos se elige por hash de la sesión para que distintos contenedores
+# asignen la misma sesión al mismo target
+SCORE_TOLERANCE = 1.5
+# Latencia inicial supuesta para targets sin observaciones (tiempo al primer
+# evento, no duración del turno)
+INITIAL_LATENCY_MS = 1000.0
+STICKY_MAX_SESSIONS = 5000
+
+# Asociación sesión -> target compartida entre contenedores (tabla de admisión).
+# Dura más que la sesión de Bedrock (idleSessionTTLInSeconds=600) y se renueva
+# con la actividad para que la conversación no cambie de agente/región.
+BINDINGS_TABLE_NAME = os.environ.get('ADMISSION_TABLE_NAME')
+SESSION_BINDING_TTL_SECONDS = 1800
+BINDING_REFRESH_SECONDS = 600
+
+# Errores que indican que el target no atendió la solicitud y es seguro reintentar en otro
+FAILOVER_ERROR_CODES = {
+    'ThrottlingException',
+    'ServiceQuotaExceededException',
+    'ServiceUnavailableException',
+    'InternalServerException',
+    'ResourceNotFoundException',
+    'AccessDeniedException'
+}
+
+_lock = threading.Lock()
+_targets = None
+_clients = {}
+_sticky = OrderedDict()
+_bindings_table = None
+
+
+class PoolConfigurationError(Exception):
+    """No hay targets de Bedrock configurados"""
+
+
+def _load_targets():
+    """Lee los targets de BEDROCK_TARGETS (JSON) o del agente único configurado"""
+    raw = os.environ.get('BEDROCK_TARGETS')
+    if raw:
+        configured = json.loads(raw)
+    else:
+        agent_id = os.environ.get('BEDROCK_AGENT_ID')
+        alias_id = os.environ.get('BEDROCK_AGENT_ALIAS_ID')
+        if not agent_id or not alias_id:
+            return []
+        configured = [{
+            'region': os.environ.get('REGION', 'us-west-2'),
+            'agent_id': agent_id,
+            'alias_id': alias_id
+        }]
+
+    targets = []
+    for conf in configured:
+        targets.append({
+            'key': f"{conf['region']}/{conf['agent_id']}/{conf['alias_id']}",
+            'region': conf['region'],
+            'agent_id': conf['agent_id'],
+            'alias_id': conf['alias_id'],
+            'latency_ms': INITIAL_LATENCY_MS,
+            'error_rate': 0.0,
+            'ejected_until': 0.0
+        })
+    return targets
+
+
+def get_targets():
+    """Retorna los targets configurados (se cargan una vez por contenedor)"""
+    global _targets
+    if _targets is None:
+        _targets = _load_targets()
+    return _targets
+
+
+def _get_client(region):
+    """Cliente bedrock-agent-runtime por región, creado en el primer uso y reutilizado"""
+    with _lock:
+        client = _clients.get(region)
+        if client is None:
+            client = boto3.client(
+                'bedrock-agent-runtime',
+                region_name=region,
+                config=bedrock_agent_runtime_config
+            )
+            _clients[region] = client
+        return client
+
+
+def _get_bindings_table():
+    """Tabla de asociaciones sesión -> target o None si no está configurada"""
+    global _bindings_table
+    if not BINDINGS_TABLE_NAME:
+        return None
+    if _bindings_table is None:
+        dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('REGION', 'us-west-2'))
+        _bindings_table = dynamodb.Table(BINDINGS_TABLE_NAME)
+    return _bindings_table
+
+
+def _load_binding(session_id, now):
+    """Asociación persistida de la sesión ({'target', 'expires_at'}) o None"""
+    table = _get_bindings_table()
+    if table is None:
+        return None
+    try:
+        item = table.get_item(Key={'pk': f"binding#{session_id}"}, ConsistentRead=True).get('Item')
+    except (ClientError, BotoCoreError) as e:
+        # Sin la tabla se conserva la afinidad local del contenedor
+        logger.warning(f"No se pudo leer la asociación de {session_id}: {str(e)}")
+        return None
+    if not item or item.get('expires_at', 0) <= now:
+        return None
+    return item
+
+
+def _store_binding(session_id, target, binding, now):
+    """Persiste la asociación si cambió de target o está por vencer"""
+    table = _get_bindings_table()
+    if table is None:
+        return
+    if (binding and binding.get('target') == target['key']
+            and binding['expires_at'] - now > SESSION_BINDING_TTL_SECONDS - BINDING_REFRESH_SECONDS):
+        return
+    try:
+        table.put_item(Item={
+            'pk': f"binding#{session_id}",
+            'target': target['key'],
+            'expires_at': int(now) + SESSION_BINDING_TTL_SECONDS
+        })
+    except (ClientError, BotoCoreError) as e:
+        logger.warning(f"No se pudo guardar la asociación de {session_id}: {str(e)}")
+
+
+def _score(target):
+    """Score de enrutamiento: menor es mejor"""
+    return target['latency_ms'] * (1 + ERROR_PENALTY * target['error_rate'])
+
+
+def _is_healthy(target, now):
+    """Un target expulsado vuelve a estar disponible al terminar su cuarentena"""
+    return target['ejected_until'] <= now
+
+
+def _hash_rank(session_id, target):
+    """Rendezvous hash de sesión y target"""
+    return hashlib.md5(f"{session_id}|{target['key']}".encode()).hexdigest()
+
+
+def _candidates(session_id, now, bound_key=None):
+    """Orden de targets a intentar para la sesión (el primero es el preferido).
+
+    bound_key es el target persistido para la sesión; tiene prioridad sobre la
+    afinidad local del contenedor.
+    """
+    targets = get_targets()
+    healthy = [t for t in targets if _is_healthy(t, now)]
+    if not healthy:
+        # Todos expulsados: intentar primero el que sale antes de cuarentena
+        return sorted(targets, key=lambda t: t['ejected_until'])
+
+    by_score = sorted(healthy, key=_score)
+
+    # Sesión en curso: mantenerla en su target mientras siga sano
+    sticky_key = bound_key
+    if sticky_key is None:
+        with _lock:
+            sticky_key = _sticky.get(session_id)
+    preferred = next((t for t in healthy if t['key'] == sticky_key), None)
+
+    if preferred is None:
+        best = _score(by_score[0])
+        equivalent = [t for t in by_score if _score(t) <= best * SCORE_TOLERANCE]
+        preferred = max(equivalent, key=lambda t: _hash_rank(session_id, t))
+
+    return [preferred] + [t for t in by_score if t is not preferred]
+
+
+def _bind_session(session_id, target):
+    """Asocia la sesión al target (LRU acotado)"""
+    with _lock:
+        _sticky.pop(session_id, None)
+        _sticky[session_id] = target['key']
+        while len(_sticky) > STICKY_MAX_SESSIONS:
+            _sticky.popitem(last=False)
+
+
+def record_result(target, latency_ms, error):
+    """Actualiza EWMA de latencia y errores; expulsa el target si falla demasiado"""
+    with _lock:
+        if error:
+            target['error_rate'] = EWMA_ALPHA + (1 - EWMA_ALPHA) * target['error_rate']
+        else:
+            target['error_rate'] = (1 - EWMA_ALPHA) * target['error_rate']
+            target['latency_ms'] = EWMA_ALPHA * latency_ms + (1 - EWMA_ALPHA) * target['latency_ms']
+
+        if target['error_rate'] >= EJECT_ERROR_RATE:
+            target['ejected_until'] = time.time() + EJECT_SECONDS
+            # Al volver de la cuarentena el target recibe tráfico de prueba
+            target['error_rate'] = EJECT_ERROR_RATE / 2
+            logger.warning(f"Target expulsado por {EJECT_SECONDS}s: {target['key']}")
+
+
+def invoke(session_id, start, consume):
+    """Invoca el agente sobre el pool con failover.
+
+    start(target, client) abre la invocación y consume(response) procesa el
+    stream. Sólo se hace failover si falla start(): una vez que el agente
+    empezó a responder pudo ejecutar acciones (p.ej. createPQR) y reintentar
+    en otra región las duplicaría.
+
+    El EWMA de ruteo se alimenta con el tiempo hasta que start() retorna
+    (primer evento de la región), no con la duración del turno: ésta depende
+    del tipo de turno (tool calls, largo de la respuesta) y no de la región.
+    """
+    now = time.time()
+    last_error = None
+    binding = _load_binding(session_id, now)
+
+    candidates = _candidates(session_id, now, binding and binding.get('target'))
+    if not candidates:
+        raise PoolConfigurationError('No hay targets de Bedrock configurados')
+
+    for target in candidates:
+        client = _get_client(target['region'])
+        started = time.time()
+
+        try:
+            response = start(target, client)
+            first_event_ms = (time.time() - started) * 1000
+        except ClientError as e:
+            error_code = e.response.get('Error', {}).get('Code')
+            if error_code not in FAILOVER_ERROR_CODES:
+                raise
+            record_result(target, 0, True)
+            logger.warning(f"Failover desde {target['key']}: {error_code}")
+            last_error = e
+            continue
+        except BotoCoreError as e:
+            # Errores de conexión / endpoint
+            record_result(target, 0, True)
+            logger.warning(f"Failover desde {target['key']}: {str(e)}")
+            last_error = e
+            continue
+
+        try:
+            result = consume(response)
+        except Exception:
+            record_result(target, 0, True)
+            raise
+
+        record_result(target, first_event_ms, False)
+        _bind_session(session_id, target)
+        _store_binding(session_id, target, binding, time.time())
+        return result
+
+    raise last_error
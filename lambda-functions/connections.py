@@ -0,0 +1,91 @@
+import json
+import os
+import time
+import logging
+import boto3
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+
+# Configuración de logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+CONNECTIONS_TABLE_NAME = os.environ.get('CONNECTIONS_TABLE_NAME')
+CUSTOMER_INDEX_NAME = 'customer_email-index'
+# API Gateway cierra las conexiones WebSocket a las 2 horas
+CONNECTION_TTL_SECONDS = 2 * 3600 + 600
+
+_table = None
+_management_clients = {}
+
+
+def _get_table():
+    """Tabla de conexiones WebSocket (creación perezosa)"""
+    global _table
+    if _table is None:
+        dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('REGION', 'us-west-2'))
+        _table = dynamodb.Table(CONNECTIONS_TABLE_NAME)
+    return _table
+
+
+def _get_management_client(endpoint_url):
+    """Cliente de la Management API de la WebSocket API (uno por endpoint, reutilizado)"""
+    client = _management_clients.get(endpoint_url)
+    if client is None:
+        client = boto3.client(
+            'apigatewaymanagementapi',
+            endpoint_url=endpoint_url,
+            region_name=os.environ.get('REGION', 'us-west-2')
+        )
+        _management_clients[endpoint_url] = client
+    return client
+
+
+def register(connection_id, session_id, customer_email=None):
+    """Registra una conexión abierta"""
+    now = int(time.time())
+    item = {
+        'connection_id': connection_id,
+        'session_id': session_id,
+        'connected_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(now)),
+        'expires_at': now + CONNECTION_TTL_SECONDS
+    }
+    # Sin email no se indexa (GSI disperso): la conexión no recibe pushes
+    if customer_email:
+        item['customer_email'] = customer_email
+    _get_table().put_item(Item=item)
+
+
+def get(connection_id):
+    """Retorna la conexión registrada o None"""
+    return _get_table().get_item(Key={'connection_id': connection_id}).get('Item')
+
+
+def remove(connection_id):
+    """Elimina una conexión del registro"""
+    _get_table().delete_item(Key={'connection_id': connection_id})
+
+
+def find_by_customer(customer_email):
+    """Conexiones abiertas de un cliente"""
+    response = _get_table().query(
+        IndexName=CUSTOMER_INDEX_NAME,
+        KeyConditionExpression=Key('customer_email').eq(customer_email)
+    )
+    return response.get('Items', [])
+
+
+def send(endpoint_url, connection_id, payload):
+    """Envía un mensaje a la conexión; si ya no existe la elimina. Retorna True si se entregó"""
+    try:
+        _get_management_client(endpoint_url).post_to_connection(
+            ConnectionId=connection_id,
+            Data=json.dumps(payload, default=str).encode('utf-8')
+        )
+        return True
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') == 'GoneException':
+            logger.info(f"Conexión cerrada, se elimina del registro: {connection_id}")
+            remove(connection_id)
+            return False
+        raise
@@ -1,31 +1,33 @@
 import json
-import boto3
 import os
 import uuid
+import time
 import logging
 import hashlib
 from botocore.exceptions import ClientError
-from botocore.config import Config
+import admission
+import jobs
+import bedrock_pool
+import tracing
+import session_context
+import transcripts
 
 # Configuración de logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Cliente Bedrock Agent Runtime con timeouts amplios
-try:
-    bedrock_agent_runtime_config = Config(
-        read_timeout=900,
-        connect_timeout=900,
-        retries={'max_attempts': 0}
-    )
-    bedrock_agent_runtime = boto3.client(
-        'bedrock-agent-runtime',
-        region_name='us-west-2',
-        config=bedrock_agent_runtime_config
-    )
-except Exception as e:
-    logger.error(f"Error inicializando cliente bedrock-agent-runtime: {str(e)}")
-    raise e
+# Presupuesto de una respuesta síncrona: límite de 29s de API Gateway menos margen
+SYNC_BUDGET_MS = int(os.environ.get('SYNC_BUDGET_MS', '26000'))
+# Estimación inicial de duración de un turno y factor de seguridad sobre el EWMA
+TURN_ESTIMATE_MS = float(os.environ.get('TURN_ESTIMATE_MS', '8000'))
+TURN_ESTIMATE_SAFETY = 1.5
+TURN_EWMA_ALPHA = 0.2
+
+# EWMA de la duración observada de los turnos en este contenedor
+_turn_ewma_ms = TURN_ESTIMATE_MS
+
+# Persistencia de transcripciones fuera del camino de respuesta (extensión interna)
+transcripts.start()
 
 def get_session_id(event):
     """Genera session_id persistente basado en el cliente"""
@@ -50,58 +52,245 @@ def get_session_id(event):
         # Fallback: usar request ID
         return event.get('requestContext', {}).get('requestId', str(uuid.uuid4()))
 
-def _response_http(status_code, body_dict):
+def _response_http(status_code, body_dict, extra_headers=None):
     """Construye respuesta HTTP JSON con CORS"""
+    headers = {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+        'Access-Control-Allow-Headers': 'Content-Type, X-Correlation-Id',
+        'Access-Control-Expose-Headers': 'Retry-After, Location, X-Correlation-Id'
+    }
+    if extra_headers:
+        headers.update(extra_headers)
     return {
         'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type'
-        },
+        'headers': headers,
         'body': json.dumps(body_dict, default=str)
     }
 
-def _invoke_agent_and_parse_stream(agent_id, agent_alias_id, session_id, input_text):
-    """Invoca agente Bedrock y procesa el stream"""
-    final_text = ""
+def _invoke_agent_and_parse_stream(session_id, input_text, session_attributes=None, trace_attrs=None,
+                                   prompt_session_attributes=None):
+    """Invoca agente Bedrock (vía pool multi-región) y procesa el stream"""
+    if trace_attrs is None:
+        trace_attrs = {}
+    
+    def start(target, client):
+        invoke_params = {
+            'agentId': target['agent_id'],
+            'agentAliasId': target['alias_id'],
+            'sessionId': session_id,
+            'inputText': input_text,
+            'enableTrace': False
+        }
+        session_state = {}
+        if session_attributes:
+            session_state['sessionAttributes'] = session_attributes
+        if prompt_session_attributes:
+            # Visibles para el modelo: evita volver a pedir datos ya conocidos
+            session_state['promptSessionAttributes'] = prompt_session_attributes
+        if session_state:
+            invoke_params['sessionState'] = session_state
+        
+        logger.info(f"Invocando agente: {target['key']}")
+        trace_attrs['target'] = target['key']
+        trace_attrs['invoke_started_ms'] = tracing.now_ms()
+        
+        try:
+            return client.invoke_agent(**invoke_params)
+        except ClientError as e:
+            logger.error(f"Error en invoke_agent: {str(e)}")
+            raise
+    
+    def consume(response):
+        final_text = ""
+        
+        # Procesar stream de respuesta
+        for event in response['completion']:
+            if 'chunk' in event:
+                if 'first_chunk_ms' not in trace_attrs:
+                    trace_attrs['first_chunk_ms'] = tracing.now_ms()
+                chunk = event['chunk']
+                decoded_chunk_bytes = chunk['bytes'].decode('utf-8', errors='replace')
+                final_text += decoded_chunk_bytes
+            elif 'error' in event:
+                logger.error(f"Error en stream: {event['error']}")
+        
+        return final_text
+    
+    return bedrock_pool.invoke(session_id, start, consume)
+
+def _record_turn_duration(duration_ms):
+    """Actualiza el EWMA de duración de turnos"""
+    global _turn_ewma_ms
+    _turn_ewma_ms = TURN_EWMA_ALPHA * duration_ms + (1 - TURN_EWMA_ALPHA) * _turn_ewma_ms
+
+def _remaining_budget_ms(event, context):
+    """Milisegundos disponibles para responder síncronamente"""
+    budget = SYNC_BUDGET_MS
+    
+    # Descontar el tiempo que la solicitud ya lleva en API Gateway (p.ej. cold start)
+    request_epoch = event.get('requestContext', {}).get('requestTimeEpoch')
+    if request_epoch:
+        budget -= max(0, int(time.time() * 1000) - int(request_epoch))
+    
+    if hasattr(context, 'get_remaining_time_in_millis'):
+        budget = min(budget, context.get_remaining_time_in_millis())
+    
+    return budget
+
+def _use_async_mode(body, event, context):
+    """Decide si el turno se atiende como job asíncrono"""
+    if not jobs.is_enabled():
+        return False
+    
+    mode = body.get('mode', 'auto')
+    if mode == 'async':
+        return True
+    if mode == 'sync':
+        return False
+    
+    # Modo auto: asíncrono sólo si el turno estimado no cabe en el presupuesto
+    estimate_ms = _turn_ewma_ms * TURN_ESTIMATE_SAFETY
+    return estimate_ms > _remaining_budget_ms(event, context)
+
+def run_turn(session_id, message, correlation_id, mode='sync', customer_context=None):
+    """Invoca el agente, registra la duración del turno y emite su span"""
+    started = time.time()
+    
+    # PQRs creadas en turnos anteriores (persistidas por bedrock_actions) prevalecen
+    # sobre las que reenvía el cliente
+    customer_context = session_context.merge_stored(
+        customer_context, session_context.stored_pqr_ids(session_id)
+    )
+    
+    with tracing.span('agent_turn', correlation_id, session_id=session_id, mode=mode) as trace_attrs:
+        # El correlation ID y el inicio del turno viajan a bedrock_actions vía sessionAttributes
+        session_attributes = {
+            tracing.CORRELATION_ATTRIBUTE: correlation_id,
+            tracing.TURN_STARTED_ATTRIBUTE: str(tracing.now_ms())
+        }
+        # Contexto conocido del cliente (email, PQR recientes)
+        session_attributes.update(customer_context or {})
+        response_text = _invoke_agent_and_parse_stream(
+            session_id, message, session_attributes, trace_attrs,
+            prompt_session_attributes=customer_context
+        )
+    
+    duration_ms = (time.time() - started) * 1000
+    _record_turn_duration(duration_ms)
+    
+    # Sólo se encola en memoria; la escritura ocurre después de responder
+    transcripts.record(session_id, correlation_id, message, response_text, {
+        'mode': mode,
+        'duration_ms': int(duration_ms),
+        'target': trace_attrs.get('target'),
+        'first_chunk_ms': trace_attrs.get('first_chunk_ms'),
+        'invoke_started_ms': trace_attrs.get('invoke_started_ms')
+    })
+    
+    logger.info(f"Respuesta del agente: {response_text[:200]}...")
+    return response_text
+
+def bedrock_error(e):
+    """Traduce un ClientError de Bedrock a (status HTTP, cuerpo de error)"""
+    error_code = e.response.get("Error", {}).get("Code")
+    error_message = e.response.get("Error", {}).get("Message", str(e))
+    logger.error(f"Error Bedrock: {error_code} - {error_message}")
     
-    invoke_params = {
-        'agentId': agent_id,
-        'agentAliasId': agent_alias_id,
-        'sessionId': session_id,
-        'inputText': input_text,
-        'enableTrace': False
+    status_code_map = {
+        "ResourceNotFoundException": 404,
+        "ValidationException": 400,
+        "ThrottlingException": 429,
+        "AccessDeniedException": 403
     }
+    http_status_code = status_code_map.get(error_code, 502)
     
-    logger.info(f"Invocando agente: {agent_id}/{agent_alias_id}")
+    return http_status_code, {
+        'error': f'Error del agente Bedrock ({error_code})',
+        'details': error_message
+    }
+
+def _run_job(job, context):
+    """Worker asíncrono: ejecuta el turno encolado y guarda el resultado"""
+    job_id = job['job_id']
+    correlation_id = job.get('correlation_id') or job_id
+    logger.info(f"Procesando job: {job_id} (correlation_id: {correlation_id})")
     
     try:
-        response = bedrock_agent_runtime.invoke_agent(**invoke_params)
+        jobs.mark_running(job_id, context.get_remaining_time_in_millis() / 1000)
+        response_text = run_turn(
+            job['session_id'], job['message'], correlation_id, 'async', job.get('customer_context')
+        )
+        jobs.complete_job(job_id, response_text)
+        
     except ClientError as e:
-        logger.error(f"Error en invoke_agent: {str(e)}")
-        raise
+        http_status_code, error_body = bedrock_error(e)
+        jobs.fail_job(job_id, http_status_code, error_body)
+        
+    except Exception as e:
+        logger.error(f"Error inesperado en job {job_id}: {str(e)}")
+        jobs.fail_job(job_id, 500, {'error': 'Error interno del servidor', 'details': str(e)})
     
-    # Procesar stream de respuesta
-    for event in response['completion']:
-        if 'chunk' in event:
-            chunk = event['chunk']
-            decoded_chunk_bytes = chunk['bytes'].decode('utf-8', errors='replace')
-            final_text += decoded_chunk_bytes
-        elif 'error' in event:
-            logger.error(f"Error en stream: {event['error']}")
+    finally:
+        # El lease de concurrencia se reservó al encolar el job
+        admission.release({'lease': job.get('lease')})
+    
+    return {'job_id': job_id}
+
+def _get_job_status(event):
+    """GET /agent/jobs/{job_id}: consulta (o long-poll con ?wait=N) de un job"""
+    job_id = (event.get('pathParameters') or {}).get('job_id')
+    if not job_id:
+        return _response_http(400, {'error': 'job_id requerido'})
+    
+    query = event.get('queryStringParameters') or {}
+    try:
+        wait_seconds = int(query.get('wait', 0))
+    except ValueError:
+        return _response_http(400, {'error': 'Parámetro wait inválido'})
+    
+    item = jobs.get_job(job_id, wait_seconds)
+    if item is None:
+        return _response_http(404, {'error': 'Job no encontrado o expirado'})
+    
+    payload = {
+        'job_id': item['job_id'],
+        'status': item['status'],
+        'session_id': item['session_id']
+    }
+    if item['status'] == jobs.STATUS_DONE:
+        payload['response'] = item['response']
+        payload['message'] = 'Respuesta del agente Novi'
+    elif item['status'] == jobs.STATUS_ERROR:
+        payload['error'] = item['error']
     
-    return final_text
+    return _response_http(200, payload)
 
 def handler(event, context):
     """Handler principal de la Lambda"""
+    try:
+        return _handle(event, context)
+    finally:
+        # Habilita el vaciado de transcripciones una vez entregada la respuesta
+        transcripts.end_invocation()
+
+def _handle(event, context):
+    """Atiende la solicitud HTTP o el job asíncrono"""
     logger.info(f"Evento recibido: {json.dumps(event)}")
     
+    # Invocación asíncrona del worker de jobs
+    if 'novi_job' in event:
+        return _run_job(event['novi_job'], context)
+    
     # Manejar OPTIONS para CORS
     if event.get('httpMethod') == 'OPTIONS':
         return _response_http(204, {})
     
+    # Consulta de jobs asíncronos
+    if event.get('httpMethod') == 'GET':
+        return _get_job_status(event)
+    
     # Obtener cuerpo de la solicitud
     try:
         if isinstance(event.get('body'), str):
@@ -117,55 +306,74 @@ def handler(event, context):
     if not message:
         return _response_http(400, {'error': 'Parámetro message requerido'})
     
-    # Usar variables de entorno para agent_id y alias_id
-    agent_id = os.environ.get('BEDROCK_AGENT_ID')
-    agent_alias_id = os.environ.get('BEDROCK_AGENT_ALIAS_ID')
-    
-    if not agent_id or not agent_alias_id:
+    # Targets del agente (BEDROCK_TARGETS o BEDROCK_AGENT_ID/BEDROCK_AGENT_ALIAS_ID)
+    if not bedrock_pool.get_targets():
         return _response_http(500, {'error': 'Configuración del agente faltante'})
     
     # Generar session_id persistente
     session_id = get_session_id(event)
-    logger.info(f"Usando session_id: {session_id}")
+    correlation_id = tracing.correlation_id_from_http(event)
+    logger.info(f"Usando session_id: {session_id} (correlation_id: {correlation_id})")
+    correlation_header = {tracing.CORRELATION_HEADER: correlation_id}
+    customer_context = session_context.from_http(event, body)
+    
+    # Control de admisión antes de gastar cuota de Bedrock
+    decision = admission.admit(session_id)
+    if not decision['admitted']:
+        logger.warning(f"Solicitud rechazada ({decision['reason']}) para session_id: {session_id}")
+        return _response_http(429, {
+            'error': 'Demasiadas solicitudes, intenta de nuevo más tarde',
+            'retry_after': decision['retry_after']
+        }, {'Retry-After': str(decision['retry_after']), **correlation_header})
     
     try:
-        # Invocar agente
-        response_text = _invoke_agent_and_parse_stream(
-            agent_id, agent_alias_id, session_id, message
-        )
+        # Modo asíncrono: encolar el turno y responder 202 con el job_id
+        if _use_async_mode(body, event, context):
+            job_id = jobs.create_job(
+                session_id, message, decision['lease'], correlation_id, customer_context
+            )
+            # El worker libera el lease al terminar
+            decision['lease'] = None
+            
+            return _response_http(202, {
+                'job_id': job_id,
+                'status': jobs.STATUS_PENDING,
+                'session_id': session_id,
+                'correlation_id': correlation_id,
+                'poll_url': f"/agent/jobs/{job_id}",
+                'message': 'Turno en proceso, consulta el job para obtener la respuesta'
+            }, {'Location': f"/agent/jobs/{job_id}", **correlation_header})
         
-        logger.info(f"Respuesta del agente: {response_text[:200]}...")
+        # Invocar agente
+        response_text = run_turn(session_id, message, correlation_id, customer_context=customer_context)
         
         # Construir respuesta
         response_payload = {
             'response': response_text,
             'session_id': session_id,
+            'correlation_id': correlation_id,
             'message': 'Respuesta del agente Novi'
         }
         
-        return _response_http(200, response_payload)
+        return _response_http(200, response_payload, correlation_header)
         
-    except ClientError as e:
-        error_code = e.response.get("Error", {}).get("Code")
-        error_message = e.response.get("Error", {}).get("Message", str(e))
-        logger.error(f"Error Bedrock: {error_code} - {error_message}")
-        
-        status_code_map = {
-            "ResourceNotFoundException": 404,
-            "ValidationException": 400,
-            "ThrottlingException": 429,
-            "AccessDeniedException": 403
-        }
-        http_status_code = status_code_map.get(error_code, 502)
+    except jobs.JobEnqueueError as e:
+        logger.error(f"Error encolando job: {str(e)}")
+        return _response_http(503, {
+            'error': 'No se pudo encolar el turno, intenta de nuevo',
+            'details': str(e)
+        }, correlation_header)
         
-        return _response_http(http_status_code, {
-            'error': f'Error del agente Bedrock ({error_code})',
-            'details': error_message
-        })
+    except ClientError as e:
+        http_status_code, error_body = bedrock_error(e)
+        return _response_http(http_status_code, error_body, correlation_header)
         
     except Exception as e:
         logger.error(f"Error inesperado: {str(e)}")
         return _response_http(500, {
             'error': 'Error interno del servidor',
             'details': str(e)
-        })
+        }, correlation_header)
+    
+    finally:
+        admission.release(decision)
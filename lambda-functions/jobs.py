@@ -0,0 +1,180 @@
+import json
+import os
+import time
+import uuid
+import logging
+import boto3
+from botocore.exceptions import BotoCoreError, ClientError
+
+# Configuración de logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+JOBS_TABLE_NAME = os.environ.get('JOBS_TABLE_NAME')
+# Tiempo que se conserva el resultado de un job antes de que DynamoDB lo expire
+JOB_TTL_SECONDS = int(os.environ.get('JOB_TTL_SECONDS', '3600'))
+# Long-poll máximo para que la respuesta quepa en el límite de 29s de API Gateway
+LONG_POLL_MAX_SECONDS = 20
+LONG_POLL_INTERVAL_SECONDS = 1.0
+# Plazo para que un job PENDIENTE arranque: maxEventAge de la cola Event (300s)
+# más el timeout de la Lambda (120s). Pasado el plazo se reporta como ERROR.
+JOB_START_DEADLINE_SECONDS = int(os.environ.get('JOB_START_DEADLINE_SECONDS', '420'))
+# Margen sobre el tiempo restante de la Lambda al marcar el job EN_PROCESO
+JOB_DEADLINE_MARGIN_SECONDS = 5
+
+# Estados de un job
+STATUS_PENDING = 'PENDIENTE'
+STATUS_RUNNING = 'EN_PROCESO'
+STATUS_DONE = 'COMPLETADA'
+STATUS_ERROR = 'ERROR'
+
+_table = None
+_lambda_client = None
+
+
+class JobEnqueueError(Exception):
+    """No se pudo registrar o encolar el job (DynamoDB/Lambda, no Bedrock)"""
+
+
+def _get_table():
+    """Retorna la tabla de jobs (creación perezosa)"""
+    global _table
+    if _table is None:
+        dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('REGION', 'us-west-2'))
+        _table = dynamodb.Table(JOBS_TABLE_NAME)
+    return _table
+
+
+def _get_lambda_client():
+    """Retorna el cliente Lambda para encolar el worker (creación perezosa)"""
+    global _lambda_client
+    if _lambda_client is None:
+        _lambda_client = boto3.client('lambda', region_name=os.environ.get('REGION', 'us-west-2'))
+    return _lambda_client
+
+
+def is_enabled():
+    """Indica si el modo asíncrono está configurado"""
+    return bool(JOBS_TABLE_NAME)
+
+
+def create_job(session_id, message, lease=None, correlation_id=None, customer_context=None):
+    """Registra el job y encola el turno invocando esta misma Lambda en modo Event"""
+    job_id = str(uuid.uuid4())
+    now = int(time.time())
+
+    try:
+        _get_table().put_item(Item={
+            'job_id': job_id,
+            'session_id': session_id,
+            'correlation_id': correlation_id or job_id,
+            'status': STATUS_PENDING,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(now)),
+            'deadline_at': now + JOB_START_DEADLINE_SECONDS,
+            'expires_at': now + JOB_TTL_SECONDS
+        })
+    except (ClientError, BotoCoreError) as e:
+        raise JobEnqueueError(f"No se pudo registrar el job: {str(e)}") from e
+
+    payload = {
+        'novi_job': {
+            'job_id': job_id,
+            'session_id': session_id,
+            'message': message,
+            'lease': lease,
+            'correlation_id': correlation_id,
+            'customer_context': customer_context
+        }
+    }
+    try:
+        _get_lambda_client().invoke(
+            FunctionName=os.environ['AWS_LAMBDA_FUNCTION_NAME'],
+            InvocationType='Event',
+            Payload=json.dumps(payload).encode('utf-8')
+        )
+    except (ClientError, BotoCoreError) as e:
+        # Sin worker el job quedaría PENDIENTE hasta el TTL: marcarlo como ERROR
+        error_body = {'error': 'No se pudo encolar el turno', 'details': str(e)}
+        try:
+            fail_job(job_id, 503, error_body)
+        except (ClientError, BotoCoreError) as mark_error:
+            logger.error(f"No se pudo marcar el job {job_id} como ERROR: {str(mark_error)}")
+        raise JobEnqueueError(f"No se pudo encolar el job {job_id}: {str(e)}") from e
+
+    logger.info(f"Job encolado: {job_id}")
+    return job_id
+
+
+def mark_running(job_id, remaining_seconds):
+    """Marca el job como en proceso con el plazo en que la Lambda del worker expira.
+
+    Si el worker termina por timeout o se cae antes de fail_job, get_job reporta
+    el job como ERROR al vencer deadline_at en lugar de dejarlo EN_PROCESO.
+    """
+    _get_table().update_item(
+        Key={'job_id': job_id},
+        UpdateExpression='SET #s = :s, deadline_at = :d',
+        ExpressionAttributeNames={'#s': 'status'},
+        ExpressionAttributeValues={
+            ':s': STATUS_RUNNING,
+            ':d': int(time.time() + remaining_seconds) + JOB_DEADLINE_MARGIN_SECONDS
+        }
+    )
+
+
+def complete_job(job_id, response_text):
+    """Guarda la respuesta del agente y renueva el TTL del job"""
+    _get_table().update_item(
+        Key={'job_id': job_id},
+        UpdateExpression='SET #s = :s, #r = :r, finished_at = :f, expires_at = :exp',
+        ExpressionAttributeNames={'#s': 'status', '#r': 'response'},
+        ExpressionAttributeValues={
+            ':s': STATUS_DONE,
+            ':r': response_text,
+            ':f': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            ':exp': int(time.time()) + JOB_TTL_SECONDS
+        }
+    )
+
+
+def fail_job(job_id, status_code, error_body):
+    """Guarda el error del turno para que el cliente lo vea al consultar"""
+    _get_table().update_item(
+        Key={'job_id': job_id},
+        UpdateExpression='SET #s = :s, http_status = :c, #e = :e, finished_at = :f',
+        ExpressionAttributeNames={'#s': 'status', '#e': 'error'},
+        ExpressionAttributeValues={
+            ':s': STATUS_ERROR,
+            ':c': status_code,
+            ':e': error_body,
+            ':f': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        }
+    )
+
+
+def _expire_if_overdue(item):
+    """Un job sin terminar cuyo deadline_at pasó ya no tiene worker vivo: se reporta como ERROR"""
+    if item is None or item['status'] in (STATUS_DONE, STATUS_ERROR):
+        return item
+    if item.get('deadline_at') is None or item['deadline_at'] > time.time():
+        return item
+    return {
+        **item,
+        'status': STATUS_ERROR,
+        'http_status': 504,
+        'error': {'error': 'El turno excedió el tiempo máximo de ejecución'}
+    }
+
+
+def get_job(job_id, wait_seconds=0):
+    """Consulta un job; con wait_seconds > 0 espera (long-poll) hasta que termine"""
+    wait_seconds = max(0, min(int(wait_seconds), LONG_POLL_MAX_SECONDS))
+    deadline = time.time() + wait_seconds
+
+    while True:
+        item = _expire_if_overdue(_get_table().get_item(Key={'job_id': job_id}, ConsistentRead=True).get('Item'))
+        if item is None or item['status'] in (STATUS_DONE, STATUS_ERROR):
+            return item
+        if time.time() + LONG_POLL_INTERVAL_SECONDS > deadline:
+            return item
+        time.sleep(LONG_POLL_INTERVAL_SECONDS)
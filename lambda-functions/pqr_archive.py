@@ -0,0 +1,110 @@
+import gzip
+import json
+import os
+import re
+import time
+import uuid
+import logging
+import boto3
+from botocore.exceptions import ClientError
+
+# Configuración de logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+ARCHIVE_BUCKET_NAME = os.environ.get('ARCHIVE_BUCKET_NAME')
+ARCHIVE_PREFIX = 'pqr-archive'
+
+# Un objeto pequeño por PQR para que la consulta sea un único GetObject
+INDEX_PREFIX = f"{ARCHIVE_PREFIX}/by-id"
+
+# Los IDs tienen la forma pqr_<epoch>, de ahí se deriva la partición por día
+PQR_ID_PATTERN = re.compile(r'^pqr_(\d+)$')
+# Caracteres permitidos en un pqr_id usado como clave S3
+SAFE_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,128}$')
+
+_s3 = None
+
+
+def _get_s3():
+    """Cliente S3 (creación perezosa)"""
+    global _s3
+    if _s3 is None:
+        _s3 = boto3.client('s3', region_name=os.environ.get('REGION', 'us-west-2'))
+    return _s3
+
+
+def is_enabled():
+    """Indica si el archivo frío está configurado"""
+    return bool(ARCHIVE_BUCKET_NAME)
+
+
+def partition_for(pqr_id):
+    """Partición del archivo (día de creación UTC) o None si el ID no tiene fecha"""
+    match = PQR_ID_PATTERN.match(pqr_id or '')
+    if not match:
+        return None
+    return time.strftime('%Y-%m-%d', time.gmtime(int(match.group(1))))
+
+
+def _index_key(pqr_id):
+    """Clave del objeto de consulta por pqr_id"""
+    return f"{INDEX_PREFIX}/{pqr_id}.json"
+
+
+def write_copy(item):
+    """Escribe la copia de consulta by-id/<pqr_id>.json de una PQR.
+
+    Se escribe al asignar el TTL, de modo que la copia fría existe antes de que
+    la tabla caliente pueda borrar el item.
+    """
+    if not is_enabled() or not SAFE_ID_PATTERN.match(item.get('pqr_id') or ''):
+        return None
+    key = _index_key(item['pqr_id'])
+    _get_s3().put_object(
+        Bucket=ARCHIVE_BUCKET_NAME,
+        Key=key,
+        Body=json.dumps(item, default=str).encode('utf-8'),
+        ContentType='application/json'
+    )
+    return key
+
+
+def write_batch(items):
+    """Archiva PQRs en S3 como JSON Lines comprimido, un objeto por día de creación"""
+    by_partition = {}
+    for item in items:
+        partition = partition_for(item.get('pqr_id')) or 'unknown'
+        by_partition.setdefault(partition, []).append(item)
+
+    keys = []
+    for partition, partition_items in by_partition.items():
+        lines = '\n'.join(json.dumps(item, default=str) for item in partition_items)
+        key = f"{ARCHIVE_PREFIX}/created={partition}/{int(time.time())}-{uuid.uuid4().hex[:8]}.jsonl.gz"
+        _get_s3().put_object(
+            Bucket=ARCHIVE_BUCKET_NAME,
+            Key=key,
+            Body=gzip.compress(lines.encode('utf-8')),
+            ContentType='application/x-ndjson',
+            ContentEncoding='gzip'
+        )
+        keys.append(key)
+        logger.info(f"Archivadas {len(partition_items)} PQRs en s3://{ARCHIVE_BUCKET_NAME}/{key}")
+
+    return keys
+
+
+def find_pqr(pqr_id):
+    """Busca una PQR en el archivo frío (un GetObject por ID). Retorna el item o None"""
+    if not is_enabled() or not SAFE_ID_PATTERN.match(pqr_id or ''):
+        return None
+
+    try:
+        body = _get_s3().get_object(Bucket=ARCHIVE_BUCKET_NAME, Key=_index_key(pqr_id))['Body'].read()
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+            return None
+        logger.error(f"Error consultando archivo de PQR: {str(e)}")
+        raise
+
+    return json.loads(body)
@@ -0,0 +1,130 @@
+import os
+import time
+import logging
+import boto3
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.exceptions import ClientError
+import pqr_archive
+
+# Configuración de logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Estados finales: sólo estas PQRs pasan al archivo frío
+RESOLVED_STATUSES = {'RESUELTA', 'CERRADA'}
+# Días que una PQR resuelta permanece en la tabla caliente antes de expirar
+ARCHIVE_AFTER_DAYS = int(os.environ.get('PQR_ARCHIVE_AFTER_DAYS', '30'))
+
+# Identidad con la que DynamoDB registra los borrados por TTL en el stream
+TTL_PRINCIPAL = 'dynamodb.amazonaws.com'
+
+_deserializer = TypeDeserializer()
+_table = None
+
+
+def _get_table():
+    """Tabla de PQRs (creación perezosa)"""
+    global _table
+    if _table is None:
+        dynamodb = boto3.resource('dynamodb', region_name=os.environ['REGION'])
+        _table = dynamodb.Table(os.environ['PQR_TABLE_NAME'])
+    return _table
+
+
+def stream_image(record, name):
+    """Deserializa NewImage/OldImage de un registro del stream"""
+    raw = record.get('dynamodb', {}).get(name)
+    if not raw:
+        return None
+    return {key: _deserializer.deserialize(value) for key, value in raw.items()}
+
+
+def _is_ttl_removal(record):
+    """True si el registro REMOVE lo generó la expiración TTL (no un borrado manual)"""
+    identity = record.get('userIdentity') or {}
+    return (
+        record.get('eventName') == 'REMOVE'
+        and identity.get('type') == 'Service'
+        and identity.get('principalId') == TTL_PRINCIPAL
+    )
+
+
+def _schedule_expiry(item):
+    """Asigna TTL a una PQR recién resuelta, con su copia fría ya escrita"""
+    now = int(time.time())
+    expires_at = now + ARCHIVE_AFTER_DAYS * 86400
+    resolved_at = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(now))
+
+    # La copia va antes que el TTL: si S3 falla el stream reintenta el registro
+    # (aún sin expires_at) y checkPQR nunca ve un hueco entre tabla y archivo
+    pqr_archive.write_copy({**item, 'expires_at': expires_at, 'resolved_at': resolved_at})
+
+    try:
+        _get_table().update_item(
+            Key={'pqr_id': item['pqr_id']},
+            UpdateExpression='SET expires_at = :exp, resolved_at = :resolved',
+            ConditionExpression='#s IN (:r1, :r2) AND attribute_not_exists(expires_at)',
+            ExpressionAttributeNames={'#s': 'status'},
+            ExpressionAttributeValues={
+                ':exp': expires_at,
+                ':resolved': resolved_at,
+                ':r1': 'RESUELTA',
+                ':r2': 'CERRADA'
+            }
+        )
+        logger.info(f"PQR {item['pqr_id']} expira en {ARCHIVE_AFTER_DAYS} días")
+    except ClientError as e:
+        # Otro cambio llegó primero (reabierta o TTL ya asignado)
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            raise
+
+
+def _cancel_expiry(item):
+    """Quita el TTL de una PQR reabierta para que no se archive"""
+    try:
+        _get_table().update_item(
+            Key={'pqr_id': item['pqr_id']},
+            UpdateExpression='REMOVE expires_at, resolved_at',
+            ConditionExpression='NOT #s IN (:r1, :r2)',
+            ExpressionAttributeNames={'#s': 'status'},
+            ExpressionAttributeValues={':r1': 'RESUELTA', ':r2': 'CERRADA'}
+        )
+        logger.info(f"PQR {item['pqr_id']} reabierta, TTL cancelado")
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            raise
+
+
+def handler(event, context):
+    """Consumidor del stream de novi-pqr-table: asigna TTL y archiva PQRs expiradas"""
+    expired = []
+
+    for record in event.get('Records', []):
+        event_name = record.get('eventName')
+
+        if _is_ttl_removal(record):
+            old_image = stream_image(record, 'OldImage')
+            if old_image:
+                expired.append(old_image)
+            continue
+
+        if event_name not in ('INSERT', 'MODIFY'):
+            continue
+
+        new_image = stream_image(record, 'NewImage') or {}
+        old_image = stream_image(record, 'OldImage') or {}
+        resolved = new_image.get('status') in RESOLVED_STATUSES
+
+        if resolved and 'expires_at' not in new_image:
+            _schedule_expiry(new_image)
+        elif resolved and 'expires_at' in old_image:
+            # Cambios sobre una PQR ya programada: mantener la copia fría al día
+            pqr_archive.write_copy(new_image)
+        elif not resolved and 'expires_at' in new_image:
+            _cancel_expiry(new_image)
+
+    # Si falla la escritura en S3 se lanza la excepción y el stream reintenta el lote
+    if expired:
+        pqr_archive.write_batch(expired)
+
+    return {'archived': len(expired)}
@@ -0,0 +1,50 @@
+import os
+import logging
+import connections
+from pqr_lifecycle import stream_image
+
+# Configuración de logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Endpoint de la Management API de la WebSocket API (https://{api}.execute-api.{region}.amazonaws.com/{stage})
+WEBSOCKET_ENDPOINT = os.environ.get('WEBSOCKET_ENDPOINT')
+
+
+def handler(event, context):
+    """Consumidor del stream de novi-pqr-table: envía los cambios de estado a los clientes conectados"""
+    pushed = 0
+
+    for record in event.get('Records', []):
+        if record.get('eventName') != 'MODIFY':
+            continue
+
+        new_image = stream_image(record, 'NewImage') or {}
+        old_image = stream_image(record, 'OldImage') or {}
+
+        # Ignorar modificaciones que no cambian el estado (p.ej. asignación de TTL)
+        if new_image.get('status') == old_image.get('status'):
+            continue
+
+        customer_email = new_image.get('customer_email')
+        if not customer_email:
+            continue
+
+        payload = {
+            'type': 'pqr_status',
+            'pqr_id': new_image['pqr_id'],
+            'status': new_image['status'],
+            'previous_status': old_image.get('status'),
+            'updated_at': new_image.get('updated_at')
+        }
+
+        for connection in connections.find_by_customer(customer_email):
+            try:
+                if connections.send(WEBSOCKET_ENDPOINT, connection['connection_id'], payload):
+                    pushed += 1
+            except Exception as e:
+                # Un push fallido no debe reintentar el lote completo
+                logger.error(f"Error enviando estado de {payload['pqr_id']} a {connection['connection_id']}: {str(e)}")
+
+    logger.info(f"Actualizaciones de estado enviadas: {pushed}")
+    return {'pushed': pushed}
@@ -0,0 +1,145 @@
+import os
+import re
+import time
+import logging
+import boto3
+from botocore.exceptions import BotoCoreError, ClientError
+
+# Configuración de logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Claves de contexto del cliente en sessionAttributes / promptSessionAttributes
+CUSTOMER_EMAIL = 'customer_email'
+RECENT_PQR_IDS = 'recent_pqr_ids'
+LAST_PQR_ID = 'last_pqr_id'
+
+# Cantidad de PQR recientes que se conservan en la sesión
+MAX_RECENT_PQRS = 5
+MAX_ATTRIBUTE_LENGTH = 256
+
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+# Formato de los IDs que genera createPQR (bedrock_actions)
+PQR_ID_PATTERN = re.compile(r'^pqr_\d+$')
+
+# PQRs creadas por sesión, persistidas para los turnos siguientes (tabla de admisión).
+# Bedrock reemplaza los sessionAttributes en cada InvokeAgent, así que lo que
+# escribe un Action Group no sobrevive al turno si no se guarda aquí.
+SESSION_CONTEXT_TABLE_NAME = os.environ.get('SESSION_CONTEXT_TABLE_NAME')
+SESSION_CONTEXT_TTL_SECONDS = 24 * 3600
+
+_table = None
+
+
+def _get_table():
+    """Tabla de contexto de sesión o None si no está configurada"""
+    global _table
+    if not SESSION_CONTEXT_TABLE_NAME:
+        return None
+    if _table is None:
+        dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('REGION', 'us-west-2'))
+        _table = dynamodb.Table(SESSION_CONTEXT_TABLE_NAME)
+    return _table
+
+
+def _context_key(session_id):
+    """Clave del contexto de la sesión en la tabla"""
+    return {'pk': f"context#{session_id}"}
+
+
+def _authenticated_email(event):
+    """Email del usuario autenticado (authorizer de API Gateway), si existe"""
+    authorizer = (event.get('requestContext') or {}).get('authorizer') or {}
+    claims = authorizer.get('claims') or {}
+    return claims.get('email') or authorizer.get('email')
+
+
+def split_ids(value):
+    """Convierte el atributo 'pqr_1,pqr_2' en lista"""
+    return [pqr_id for pqr_id in (value or '').split(',') if pqr_id]
+
+
+def _is_pqr_id(value):
+    """True si el valor tiene el formato de un ID de PQR"""
+    return isinstance(value, str) and len(value) <= MAX_ATTRIBUTE_LENGTH and bool(PQR_ID_PATTERN.match(value))
+
+
+def from_http(event, body):
+    """Construye el contexto conocido del cliente para inyectarlo en la sesión del agente.
+
+    El email autenticado tiene prioridad sobre el enviado en el body. Bedrock
+    sólo acepta strings, por eso la lista de PQR se envía separada por comas.
+    """
+    provided = body.get('customer_context') or {}
+    if not isinstance(provided, dict):
+        provided = {}
+
+    context = {}
+
+    email = _authenticated_email(event) or provided.get('customer_email')
+    if isinstance(email, str) and EMAIL_PATTERN.match(email) and len(email) <= MAX_ATTRIBUTE_LENGTH:
+        context[CUSTOMER_EMAIL] = email
+
+    # Los IDs llegan al prompt del modelo: sólo se aceptan con el formato de createPQR
+    recent = provided.get('recent_pqr_ids') or []
+    if isinstance(recent, list):
+        recent = [pqr_id for pqr_id in recent if _is_pqr_id(pqr_id)][:MAX_RECENT_PQRS]
+        if recent:
+            context[RECENT_PQR_IDS] = ','.join(recent)
+            context[LAST_PQR_ID] = recent[0]
+
+    return context
+
+
+def with_created_pqr(attributes, pqr_id):
+    """Retorna una copia de los atributos con la PQR recién creada al frente"""
+    updated = dict(attributes or {})
+    recent = [pqr_id] + [other for other in split_ids(updated.get(RECENT_PQR_IDS)) if other != pqr_id]
+    updated[RECENT_PQR_IDS] = ','.join(recent[:MAX_RECENT_PQRS])
+    updated[LAST_PQR_ID] = pqr_id
+    return updated
+
+
+def remember_created_pqr(session_id, pqr_id):
+    """Persiste la PQR creada para que los siguientes turnos de la sesión la conozcan"""
+    table = _get_table()
+    if table is None or not session_id:
+        return
+    try:
+        item = table.get_item(Key=_context_key(session_id), ConsistentRead=True).get('Item') or {}
+        recent = [pqr_id] + [other for other in item.get(RECENT_PQR_IDS, []) if other != pqr_id]
+        table.put_item(Item={
+            **_context_key(session_id),
+            RECENT_PQR_IDS: recent[:MAX_RECENT_PQRS],
+            'expires_at': int(time.time()) + SESSION_CONTEXT_TTL_SECONDS
+        })
+    except (ClientError, BotoCoreError) as e:
+        logger.warning(f"No se pudo guardar la PQR {pqr_id} de la sesión {session_id}: {str(e)}")
+
+
+def stored_pqr_ids(session_id):
+    """PQRs creadas en la sesión (la más reciente primero); [] si no hay o falla la tabla"""
+    table = _get_table()
+    if table is None or not session_id:
+        return []
+    try:
+        item = table.get_item(Key=_context_key(session_id), ConsistentRead=True).get('Item') or {}
+    except (ClientError, BotoCoreError) as e:
+        logger.warning(f"No se pudo leer el contexto de la sesión {session_id}: {str(e)}")
+        return []
+    if item.get('expires_at', 0) <= time.time():
+        return []
+    return list(item.get(RECENT_PQR_IDS, []))
+
+
+def merge_stored(context, stored_ids):
+    """Antepone las PQRs persistidas de la sesión a las enviadas por el cliente"""
+    merged = dict(context or {})
+    if not stored_ids:
+        return merged
+    recent = list(stored_ids) + [
+        pqr_id for pqr_id in split_ids(merged.get(RECENT_PQR_IDS)) if pqr_id not in stored_ids
+    ]
+    merged[RECENT_PQR_IDS] = ','.join(recent[:MAX_RECENT_PQRS])
+    merged[LAST_PQR_ID] = recent[0]
+    return merged
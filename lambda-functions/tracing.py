@@ -0,0 +1,62 @@
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+
+# Header HTTP con el que un cliente puede enviar su propio correlation ID
+CORRELATION_HEADER = 'X-Correlation-Id'
+# Clave usada en sessionAttributes de Bedrock
+CORRELATION_ATTRIBUTE = 'correlation_id'
+# Inicio del turno (epoch ms) para medir el tiempo del agente entre tool calls
+TURN_STARTED_ATTRIBUTE = 'turn_started_ms'
+
+
+def now_ms():
+    """Epoch actual en milisegundos"""
+    return int(time.time() * 1000)
+
+
+def correlation_id_from_http(event):
+    """Usa el X-Correlation-Id del cliente o genera uno nuevo"""
+    headers = event.get('headers') or {}
+    for name, value in headers.items():
+        if name.lower() == CORRELATION_HEADER.lower() and value:
+            return value[:128]
+    return str(uuid.uuid4())
+
+
+def correlation_from_action_event(event):
+    """Lee correlation ID e inicio de turno de un evento de Action Group"""
+    attributes = event.get('sessionAttributes') or {}
+    turn_started = attributes.get(TURN_STARTED_ATTRIBUTE)
+    return attributes.get(CORRELATION_ATTRIBUTE), int(turn_started) if turn_started else None
+
+
+def emit_span(name, correlation_id, start_ms, end_ms, **attrs):
+    """Escribe un registro de span en CloudWatch Logs (una línea JSON)"""
+    record = {
+        'type': 'span',
+        'correlation_id': correlation_id,
+        'span': name,
+        'service': os.environ.get('AWS_LAMBDA_FUNCTION_NAME', 'local'),
+        'start_ms': start_ms,
+        'end_ms': end_ms,
+        'duration_ms': end_ms - start_ms
+    }
+    record.update(attrs)
+    print(json.dumps(record, default=str))
+
+
+@contextmanager
+def span(name, correlation_id, **attrs):
+    """Mide un bloque y emite su span; los atributos se pueden completar dentro del bloque"""
+    start_ms = now_ms()
+    status = 'ok'
+    try:
+        yield attrs
+    except Exception:
+        status = 'error'
+        raise
+    finally:
+        emit_span(name, correlation_id, start_ms, now_ms(), status=status, **attrs)
@@ -0,0 +1,156 @@
+import json
+import os
+import time
+import logging
+import threading
+import urllib.request
+import boto3
+from collections import deque
+
+# Configuración de logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+TRANSCRIPTS_TABLE_NAME = os.environ.get('TRANSCRIPTS_TABLE_NAME')
+TRANSCRIPT_TTL_DAYS = int(os.environ.get('TRANSCRIPT_TTL_DAYS', '90'))
+# Turnos máximos en memoria; al llenarse se aplica la política de descarte
+MAX_BUFFERED_TURNS = int(os.environ.get('TRANSCRIPT_MAX_BUFFERED', '500'))
+# drop_oldest: conserva lo más reciente / drop_newest: rechaza turnos nuevos
+DROP_POLICY = os.environ.get('TRANSCRIPT_DROP_POLICY', 'drop_oldest')
+# Límite de caracteres por texto para no superar los 400KB de un item de DynamoDB
+MAX_TEXT_CHARS = 100000
+
+EXTENSION_NAME = 'novi-transcripts'
+
+_lock = threading.Lock()
+_buffer = deque()
+_table = None
+# Cada invocación terminada libera un permiso; la extensión vacía el buffer al recibirlo
+_invocations_done = threading.Semaphore(0)
+_extension_active = False
+
+stats = {'recorded': 0, 'dropped': 0, 'flushed': 0, 'flush_errors': 0}
+
+
+def _get_table():
+    """Tabla de transcripciones (creación perezosa)"""
+    global _table
+    if _table is None:
+        dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('REGION', 'us-west-2'))
+        _table = dynamodb.Table(TRANSCRIPTS_TABLE_NAME)
+    return _table
+
+
+def is_enabled():
+    """Indica si la persistencia de transcripciones está configurada"""
+    return bool(TRANSCRIPTS_TABLE_NAME)
+
+
+def _push(items):
+    """Agrega items al buffer respetando el límite de memoria"""
+    with _lock:
+        for item in items:
+            if len(_buffer) >= MAX_BUFFERED_TURNS:
+                stats['dropped'] += 1
+                if DROP_POLICY == 'drop_newest':
+                    continue
+                _buffer.popleft()
+            _buffer.append(item)
+
+
+def record(session_id, correlation_id, message, response_text, timings):
+    """Guarda el turno en memoria (sin E/S); se persiste después de responder"""
+    if not is_enabled():
+        return
+
+    now_ms = int(time.time() * 1000)
+    _push([{
+        'session_id': session_id,
+        'turn_id': f"{now_ms:013d}#{correlation_id}",
+        'correlation_id': correlation_id,
+        'message': (message or '')[:MAX_TEXT_CHARS],
+        'response': (response_text or '')[:MAX_TEXT_CHARS],
+        'timings': json.dumps(timings, default=str),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(now_ms / 1000)),
+        'expires_at': now_ms // 1000 + TRANSCRIPT_TTL_DAYS * 86400
+    }])
+    stats['recorded'] += 1
+
+
+def flush():
+    """Escribe en lote todo lo acumulado en el buffer"""
+    with _lock:
+        items = list(_buffer)
+        _buffer.clear()
+    if not items:
+        return 0
+
+    try:
+        with _get_table().batch_writer() as batch:
+            for item in items:
+                batch.put_item(Item=item)
+        stats['flushed'] += len(items)
+        return len(items)
+    except Exception as e:
+        # Devolver al buffer para el próximo intento (sujeto al límite de memoria)
+        stats['flush_errors'] += 1
+        logger.error(f"Error guardando {len(items)} transcripciones: {str(e)}")
+        _push(items)
+        return 0
+
+
+def end_invocation():
+    """Marca el fin de la invocación; el vaciado ocurre fuera del camino de respuesta"""
+    if not is_enabled():
+        return
+    if _extension_active:
+        _invocations_done.release()
+    elif _buffer:
+        # Sin extensión (ejecución local): vaciar en un hilo aparte
+        threading.Thread(target=flush, daemon=True).start()
+
+
+def _extension_request(method, path, extension_id=None, body=None):
+    """Llamada HTTP a la Extensions API del runtime de Lambda"""
+    url = f"http://{os.environ['AWS_LAMBDA_RUNTIME_API']}/2020-01-01/extension/{path}"
+    headers = {'Lambda-Extension-Name': EXTENSION_NAME}
+    if extension_id:
+        headers = {'Lambda-Extension-Identifier': extension_id}
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    request = urllib.request.Request(url, data=data, headers=headers, method=method)
+    return urllib.request.urlopen(request)
+
+
+def _extension_loop(extension_id):
+    """Extensión interna: tras cada invocación vacía el buffer antes de que Lambda congele el contenedor.
+
+    Lambda entrega la respuesta al cliente apenas el handler retorna, pero no
+    congela el contenedor hasta que la extensión pide el siguiente evento.
+    """
+    while True:
+        response = _extension_request('GET', 'event/next', extension_id)
+        event = json.loads(response.read())
+        if event.get('eventType') != 'INVOKE':
+            continue
+
+        # Esperar a que el handler termine (con margen hasta el deadline de la invocación)
+        timeout = max(0.0, event.get('deadlineMs', 0) / 1000 - time.time())
+        _invocations_done.acquire(timeout=timeout)
+        flush()
+
+
+def start():
+    """Registra la extensión interna durante el init de la Lambda"""
+    global _extension_active
+    if not is_enabled() or _extension_active or 'AWS_LAMBDA_RUNTIME_API' not in os.environ:
+        return
+
+    try:
+        response = _extension_request('POST', 'register', body={'events': ['INVOKE']})
+        extension_id = response.headers['Lambda-Extension-Identifier']
+    except Exception as e:
+        logger.warning(f"Extensión de transcripciones no disponible: {str(e)}")
+        return
+
+    threading.Thread(target=_extension_loop, args=(extension_id,), daemon=True).start()
+    _extension_active = True
@@ -0,0 +1,87 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+import logging
+import boto3
+
+# Configuración de logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Secreto compartido con el backend que autentica al cliente y emite los tokens
+WEBSOCKET_TOKEN_SECRET_ARN = os.environ.get('WEBSOCKET_TOKEN_SECRET_ARN')
+
+_secret = None
+
+
+def _get_secret():
+    """Secreto de firma de tokens (se lee una vez por contenedor)"""
+    global _secret
+    if _secret is None:
+        client = boto3.client('secretsmanager', region_name=os.environ.get('REGION', 'us-west-2'))
+        _secret = client.get_secret_value(SecretId=WEBSOCKET_TOKEN_SECRET_ARN)['SecretString'].encode('utf-8')
+    return _secret
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(value):
+    return base64.urlsafe_b64decode(value + '=' * (-len(value) % 4))
+
+
+def issue_token(email, ttl_seconds=3600, secret=None):
+    """Emite un token firmado '<payload>.<firma>' para conectarse con el email del cliente"""
+    payload = _b64encode(json.dumps({'email': email, 'exp': int(time.time()) + ttl_seconds}).encode('utf-8'))
+    signature = hmac.new(secret or _get_secret(), payload.encode('ascii'), hashlib.sha256).digest()
+    return f"{payload}.{_b64encode(signature)}"
+
+
+def verify_token(token, secret=None):
+    """Retorna el email del token si la firma es válida y no expiró; None en otro caso"""
+    try:
+        payload, signature = token.split('.')
+        expected = hmac.new(secret or _get_secret(), payload.encode('ascii'), hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, _b64decode(signature)):
+            return None
+        claims = json.loads(_b64decode(payload))
+    except (ValueError, TypeError):
+        return None
+
+    if not isinstance(claims.get('email'), str) or claims.get('exp', 0) <= time.time():
+        return None
+    return claims['email']
+
+
+def _policy(effect, resource, context=None):
+    """Respuesta del authorizer REQUEST de API Gateway"""
+    response = {
+        'principalId': (context or {}).get('email', 'anonymous'),
+        'policyDocument': {
+            'Version': '2012-10-17',
+            'Statement': [{'Action': 'execute-api:Invoke', 'Effect': effect, 'Resource': resource}]
+        }
+    }
+    if context:
+        response['context'] = context
+    return response
+
+
+def handler(event, context):
+    """Authorizer de $connect: sin token la conexión es anónima (sin notificaciones),
+    con token inválido o expirado se rechaza"""
+    token = (event.get('queryStringParameters') or {}).get('token')
+    if not token:
+        return _policy('Allow', event['methodArn'])
+
+    email = verify_token(token)
+    if email is None:
+        logger.warning("Token de WebSocket inválido o expirado")
+        return _policy('Deny', event['methodArn'])
+
+    # El contexto llega a websocket_chat como requestContext.authorizer.email
+    return _policy('Allow', event['methodArn'], {'email': email})
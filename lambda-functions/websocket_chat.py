@@ -0,0 +1,147 @@
+import json
+import uuid
+import logging
+from botocore.exceptions import BotoCoreError, ClientError
+import admission
+import bedrock_pool
+import connections
+import invoke_agent
+import session_context
+import transcripts
+
+# Configuración de logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+def _endpoint_url(event):
+    """Endpoint de la Management API para responder por la misma conexión"""
+    request_context = event['requestContext']
+    return f"https://{request_context['domainName']}/{request_context['stage']}"
+
+
+def _reply(endpoint_url, connection_id, payload):
+    """Envía un mensaje por la conexión; un fallo al responder no debe romper el handler"""
+    try:
+        connections.send(endpoint_url, connection_id, payload)
+    except (ClientError, BotoCoreError) as e:
+        logger.error(f"No se pudo responder a {connection_id}: {str(e)}")
+
+
+def _on_connect(event):
+    """$connect: registra la conexión con su sesión y el email autenticado del cliente"""
+    request_context = event['requestContext']
+    query = event.get('queryStringParameters') or {}
+
+    # Sólo el email del authorizer se indexa para notificaciones: un email enviado
+    # en la query permitiría suscribirse a las PQRs de otro cliente
+    customer_context = session_context.from_http(event, {})
+    session_id = query.get('session_id') or f"ws-{uuid.uuid4().hex[:16]}"
+
+    connections.register(
+        request_context['connectionId'],
+        session_id,
+        customer_context.get(session_context.CUSTOMER_EMAIL)
+    )
+    logger.info(f"Conexión abierta: {request_context['connectionId']} (session_id: {session_id})")
+    return {'statusCode': 200}
+
+
+def _on_disconnect(event):
+    """$disconnect: elimina la conexión del registro"""
+    connections.remove(event['requestContext']['connectionId'])
+    return {'statusCode': 200}
+
+
+def _on_message(event):
+    """Mensaje de chat: mismo flujo que POST /agent, respondiendo por la conexión"""
+    connection_id = event['requestContext']['connectionId']
+    endpoint_url = _endpoint_url(event)
+
+    try:
+        body = json.loads(event.get('body') or '{}')
+    except json.JSONDecodeError:
+        _reply(endpoint_url, connection_id, {'type': 'error', 'error': 'JSON inválido'})
+        return {'statusCode': 200}
+
+    message = body.get('message')
+    if not message:
+        _reply(endpoint_url, connection_id, {'type': 'error', 'error': 'Parámetro message requerido'})
+        return {'statusCode': 200}
+
+    # Targets del agente (BEDROCK_TARGETS o BEDROCK_AGENT_ID/BEDROCK_AGENT_ALIAS_ID)
+    if not bedrock_pool.get_targets():
+        _reply(endpoint_url, connection_id, {'type': 'error', 'error': 'Configuración del agente faltante'})
+        return {'statusCode': 200}
+
+    connection = connections.get(connection_id) or {}
+    session_id = body.get('session_id') or connection.get('session_id') or f"ws-{uuid.uuid4().hex[:16]}"
+    correlation_id = body.get('correlation_id') or str(uuid.uuid4())
+
+    customer_context = session_context.from_http(event, body)
+    if session_context.CUSTOMER_EMAIL not in customer_context and connection.get('customer_email'):
+        customer_context[session_context.CUSTOMER_EMAIL] = connection['customer_email']
+
+    # Control de admisión antes de gastar cuota de Bedrock
+    decision = admission.admit(session_id)
+    if not decision['admitted']:
+        _reply(endpoint_url, connection_id, {
+            'type': 'error',
+            'error': 'Demasiadas solicitudes, intenta de nuevo más tarde',
+            'retry_after': decision['retry_after'],
+            'correlation_id': correlation_id
+        })
+        return {'statusCode': 200}
+
+    try:
+        response_text = invoke_agent.run_turn(
+            session_id, message, correlation_id, 'websocket', customer_context
+        )
+        reply = {
+            'type': 'agent_response',
+            'response': response_text,
+            'session_id': session_id,
+            'correlation_id': correlation_id,
+            'message': 'Respuesta del agente Novi'
+        }
+
+    except ClientError as e:
+        http_status_code, error_body = invoke_agent.bedrock_error(e)
+        reply = {
+            'type': 'error',
+            'status': http_status_code,
+            'correlation_id': correlation_id,
+            **error_body
+        }
+
+    except Exception as e:
+        logger.error(f"Error inesperado en WebSocket: {str(e)}")
+        reply = {
+            'type': 'error',
+            'error': 'Error interno del servidor',
+            'correlation_id': correlation_id
+        }
+
+    finally:
+        admission.release(decision)
+
+    # Fuera del try: un error al enviar no se confunde con un error de Bedrock
+    _reply(endpoint_url, connection_id, reply)
+    return {'statusCode': 200}
+
+
+def handler(event, context):
+    """Handler de la WebSocket API (rutas $connect, $disconnect y $default)"""
+    try:
+        route_key = event.get('requestContext', {}).get('routeKey')
+        logger.info(f"Ruta WebSocket: {route_key}")
+
+        if route_key == '$connect':
+            return _on_connect(event)
+        if route_key == '$disconnect':
+            return _on_disconnect(event)
+        return _on_message(event)
+
+    finally:
+        # Habilita el vaciado de transcripciones una vez entregada la respuesta
+        transcripts.end_invocation()
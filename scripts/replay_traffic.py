@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Reproduce una captura de tráfico (ver traffic_capture.py) contra
+invoke_agent.handler y bedrock_actions.handler sin salir a AWS.
+
+Bedrock se reemplaza por un runtime falso que respeta los tiempos grabados
+(tool calls, primer chunk, fin del stream) e invoca bedrock_actions.handler
+como lo haría el agente; DynamoDB se reemplaza por una tabla en memoria.
+Al final se reporta la distribución de latencias por ruta.
+
+Uso:
+    python3 replay_traffic.py capture.jsonl              # ritmo original (1x)
+    python3 replay_traffic.py capture.jsonl --speed 10   # llegadas 10x más rápidas
+    python3 replay_traffic.py capture.jsonl --latency-scale 0.1 --json
+"""
+
+import argparse
+import io
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+
+# Agregar el directorio de lambda-functions al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda-functions'))
+
+# Configuración offline antes de importar las Lambdas
+os.environ['BEDROCK_AGENT_ID'] = 'REPLAY'
+os.environ['BEDROCK_AGENT_ALIAS_ID'] = 'REPLAY'
+os.environ['REGION'] = 'us-west-2'
+os.environ['PQR_TABLE_NAME'] = 'replay-pqr-table'
+for name in ('BEDROCK_TARGETS', 'ADMISSION_TABLE_NAME', 'JOBS_TABLE_NAME', 'SESSION_CONTEXT_TABLE_NAME',
+             'TRANSCRIPTS_TABLE_NAME', 'ARCHIVE_BUCKET_NAME', 'AWS_LAMBDA_RUNTIME_API'):
+    os.environ.pop(name, None)
+
+import admission
+import bedrock_actions
+import bedrock_pool
+import invoke_agent
+
+
+class FakeTable:
+    """Tabla DynamoDB en memoria (sólo las operaciones que usa bedrock_actions)"""
+
+    def __init__(self):
+        self.items = {}
+        self.lock = threading.Lock()
+
+    def put_item(self, Item):
+        with self.lock:
+            self.items[Item['pqr_id']] = dict(Item)
+        return {}
+
+    def get_item(self, Key):
+        with self.lock:
+            item = self.items.get(Key['pqr_id'])
+        return {'Item': dict(item)} if item else {}
+
+
+class FakeBoto3:
+    """Sustituto de boto3 para bedrock_actions"""
+
+    def __init__(self, table):
+        self.table = table
+
+    def resource(self, service_name, **kwargs):
+        return self
+
+    def Table(self, name):
+        return self.table
+
+
+class FakeContext:
+    """Contexto Lambda mínimo"""
+
+    def get_remaining_time_in_millis(self):
+        return 120000
+
+
+class Recorder:
+    """Acumula latencias por ruta de forma thread-safe"""
+
+    def __init__(self):
+        self.samples = {}
+        self.statuses = {}
+        self.lock = threading.Lock()
+
+    def add(self, route, latency_ms, status=None):
+        with self.lock:
+            self.samples.setdefault(route, []).append(latency_ms)
+            if status is not None:
+                counts = self.statuses.setdefault(route, {})
+                counts[status] = counts.get(status, 0) + 1
+
+
+class FakeAgentRuntime:
+    """Runtime de Bedrock Agent que reproduce los tiempos grabados de cada turno"""
+
+    def __init__(self, recorder, latency_scale):
+        self.recorder = recorder
+        self.latency_scale = latency_scale
+        self.scripts = {}
+        self.last_pqr_by_session = {}
+        self.lock = threading.Lock()
+
+    def register(self, correlation_id, turn):
+        """Asocia el turno grabado al correlation ID con el que se invocará"""
+        with self.lock:
+            self.scripts[correlation_id] = turn
+
+    def invoke_agent(self, agentId, agentAliasId, sessionId, inputText, enableTrace=False, sessionState=None):
+        attributes = dict((sessionState or {}).get('sessionAttributes') or {})
+        prompt_attributes = dict((sessionState or {}).get('promptSessionAttributes') or {})
+        with self.lock:
+            turn = self.scripts.pop(attributes.get('correlation_id'))
+        return {'completion': self._stream(turn, sessionId, attributes, prompt_attributes)}
+
+    def _sleep_until(self, started, offset_ms):
+        remaining = started + offset_ms * self.latency_scale / 1000 - time.time()
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def _stream(self, turn, session_id, attributes, prompt_attributes):
+        started = time.time()
+
+        for action in turn['actions']:
+            self._sleep_until(started, action['at_ms'])
+
+            parameters = dict(action.get('parameters') or {})
+            if action['api_path'] == '/checkPQR' and 'pqr_id' not in parameters:
+                parameters['pqr_id'] = self.last_pqr_by_session.get(session_id, 'pqr_0')
+
+            event = {
+                'actionGroup': 'PQRActions',
+                'apiPath': action['api_path'],
+                'httpMethod': 'POST',
+                'sessionId': session_id,
+                'parameters': [{'name': k, 'value': v} for k, v in parameters.items()],
+                'sessionAttributes': attributes,
+                'promptSessionAttributes': prompt_attributes
+            }
+            action_started = time.perf_counter()
+            result = bedrock_actions.handler(event, None)
+            self.recorder.add(
+                f"action {action['api_path']}",
+                (time.perf_counter() - action_started) * 1000,
+                result['response']['httpStatusCode']
+            )
+
+            # El agente conserva los atributos devueltos por el Action Group
+            attributes = result.get('sessionAttributes', attributes)
+            prompt_attributes = result.get('promptSessionAttributes', prompt_attributes)
+            if attributes.get('last_pqr_id'):
+                self.last_pqr_by_session[session_id] = attributes['last_pqr_id']
+
+        text = ('x' * turn['bedrock'].get('response_chars', 300)).encode('utf-8')
+        half = len(text) // 2
+
+        self._sleep_until(started, turn['bedrock']['first_chunk_ms'])
+        yield {'chunk': {'bytes': text[:half]}}
+        self._sleep_until(started, turn['bedrock']['total_ms'])
+        yield {'chunk': {'bytes': text[half:]}}
+
+
+def percentile(values, pct):
+    """Percentil por rango más cercano"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(recorder):
+    """Resumen de latencias (ms) por ruta"""
+    summary = {}
+    for route, samples in sorted(recorder.samples.items()):
+        summary[route] = {
+            'count': len(samples),
+            'p50_ms': round(percentile(samples, 50), 1),
+            'p90_ms': round(percentile(samples, 90), 1),
+            'p99_ms': round(percentile(samples, 99), 1),
+            'max_ms': round(max(samples), 1),
+            'status': recorder.statuses.get(route, {})
+        }
+    return summary
+
+
+def replay(capture, speed, latency_scale, max_workers, use_admission):
+    """Ejecuta la captura y retorna el resumen de latencias"""
+    recorder = Recorder()
+    runtime = FakeAgentRuntime(recorder, latency_scale)
+    run_id = uuid.uuid4().hex[:6]
+
+    # Sustituir dependencias externas por los fakes
+    bedrock_actions.boto3 = FakeBoto3(FakeTable())
+    bedrock_pool._targets = None
+    bedrock_pool._get_client = lambda region: runtime
+    if not use_admission:
+        admission.admit = lambda session_id: {'admitted': True, 'reason': 'ok', 'retry_after': 0, 'lease': None}
+
+    def run_turn(turn):
+        correlation_id = f"replay-{run_id}-{uuid.uuid4().hex[:8]}"
+        runtime.register(correlation_id, turn)
+        event = {
+            'httpMethod': 'POST',
+            'headers': {'X-Correlation-Id': correlation_id},
+            'requestContext': {'requestTimeEpoch': int(time.time() * 1000)},
+            'body': json.dumps({
+                'message': turn['request']['message'],
+                'session_id': f"{turn['session']}-{run_id}",
+                'mode': 'sync'
+            })
+        }
+        started = time.perf_counter()
+        result = invoke_agent.handler(event, FakeContext())
+        recorder.add(f"agent {turn['route']}", (time.perf_counter() - started) * 1000, result['statusCode'])
+
+    replay_started = time.time()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        for turn in sorted(capture, key=lambda t: t['offset_ms']):
+            delay = replay_started + turn['offset_ms'] / speed / 1000 - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(executor.submit(run_turn, turn))
+        for future in futures:
+            future.result()
+
+    return summarize(recorder), time.time() - replay_started
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description='Reproduce tráfico capturado contra las Lambdas de Novi')
+    parser.add_argument('capture', help='Archivo de captura JSON Lines')
+    parser.add_argument('--speed', type=float, default=1.0, help='Aceleración de llegadas (1 = ritmo original)')
+    parser.add_argument('--latency-scale', type=float, default=1.0,
+                        help='Escala de los tiempos grabados de Bedrock (1 = reales)')
+    parser.add_argument('--workers', type=int, default=64, help='Turnos concurrentes máximos')
+    parser.add_argument('--no-admission', action='store_true', help='Desactivar el control de admisión')
+    parser.add_argument('--json', action='store_true', help='Imprimir el resumen como JSON')
+    args = parser.parse_args()
+
+    with open(args.capture, encoding='utf-8') as f:
+        capture = [json.loads(line) for line in f if line.strip()]
+
+    # Silenciar logs y spans de las Lambdas durante la reproducción
+    logging.getLogger().setLevel(logging.CRITICAL)
+    with redirect_stdout(io.StringIO()):
+        summary, elapsed = replay(capture, args.speed, args.latency_scale, args.workers, not args.no_admission)
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    print(f"🔁 {len(capture)} turnos reproducidos en {elapsed:.1f}s (speed={args.speed}x)")
+    print(f"{'ruta':<22}{'n':>6}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}  status")
+    for route, stats in summary.items():
+        print(f"{route:<22}{stats['count']:>6}{stats['p50_ms']:>10}{stats['p90_ms']:>10}"
+              f"{stats['p99_ms']:>10}{stats['max_ms']:>10}  {stats['status']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -80,6 +80,7 @@ R: {{ faq.respuesta }}
 - Solo crea PQR para problemas específicos no cubiertos en FAQs
 - Para crear PQR necesitas: customer_email, description, priority (ALTA/MEDIA/BAJA), category (PEDIDOS/GENERAL/SOPORTE/FACTURACION)
 - Si falta información, solicítala al usuario antes de crear la PQR
+- Si el contexto de la sesión incluye customer_email, recent_pqr_ids o last_pqr_id, úsalos directamente sin volver a preguntarlos
 - Mantén un tono profesional y empático
 
 ## Categorías de PQR
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Construye una captura sanitizada de tráfico real de /agent a partir de los
+registros de span de CloudWatch Logs (invoke_agent + bedrock_actions).
+
+Formato de captura (JSON Lines, un turno por línea):
+
+    {
+      "version": 1,
+      "offset_ms": 1520,                 # inicio relativo al primer turno
+      "route": "faq|create_pqr|check_pqr",
+      "session": "s-3f2a9c1b",           # session_id anonimizado
+      "request": {"message": "...", "mode": "sync"},
+      "bedrock": {"first_chunk_ms": 2100, "total_ms": 4800, "response_chars": 320},
+      "actions": [
+        {"api_path": "/createPQR", "at_ms": 1400, "duration_ms": 85,
+         "parameters": {"customer_email": "cliente@example.com", ...}}
+      ]
+    }
+
+Uso:
+    aws logs filter-log-events --log-group-name /aws/lambda/novi-invoke-agent \\
+        --filter-pattern '{ $.type = "span" }' --query 'events[].message' > agent.json
+    aws logs filter-log-events --log-group-name /aws/lambda/novi-bedrock-actions \\
+        --filter-pattern '{ $.type = "span" }' --query 'events[].message' > actions.json
+    python3 traffic_capture.py agent.json actions.json -o capture.jsonl
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+
+CAPTURE_VERSION = 1
+
+EMAIL_PATTERN = re.compile(r'[^@\s]+@[^@\s]+\.[^@\s]+')
+DIGITS_PATTERN = re.compile(r'\d{4,}')
+
+# Parámetros sanitizados para las tool calls (los spans no registran datos del cliente)
+SANITIZED_PARAMETERS = {
+    '/createPQR': {
+        'customer_email': 'cliente@example.com',
+        'description': 'Descripción sanitizada',
+        'priority': 'MEDIA',
+        'category': 'GENERAL'
+    },
+    '/checkPQR': {}
+}
+
+
+def sanitize_text(text):
+    """Elimina emails y secuencias numéricas largas (teléfonos, documentos, pedidos)"""
+    text = EMAIL_PATTERN.sub('cliente@example.com', text or '')
+    return DIGITS_PATTERN.sub(lambda match: '0' * len(match.group(0)), text)
+
+
+def anonymize_session(session_id):
+    """Hash estable del session_id"""
+    return 's-' + hashlib.sha256((session_id or '').encode()).hexdigest()[:8]
+
+
+def load_records(path):
+    """Lee registros de log: arreglo JSON de mensajes o JSON Lines"""
+    with open(path, encoding='utf-8') as f:
+        content = f.read().strip()
+
+    if content.startswith('['):
+        raw = json.loads(content)
+    else:
+        raw = [line for line in content.splitlines() if line.strip()]
+
+    records = []
+    for entry in raw:
+        if isinstance(entry, str):
+            try:
+                entry = json.loads(entry)
+            except json.JSONDecodeError:
+                continue
+        if isinstance(entry, dict) and entry.get('type') == 'span':
+            records.append(entry)
+    return records
+
+
+def load_transcripts(path):
+    """Turnos por correlation_id desde un export JSON Lines de novi-transcripts-table"""
+    transcripts = {}
+    if not path:
+        return transcripts
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                transcripts[item['correlation_id']] = item
+    return transcripts
+
+
+def classify_route(actions):
+    """Ruta del turno según las tool calls que hizo el agente"""
+    paths = {action['api_path'] for action in actions}
+    if '/createPQR' in paths:
+        return 'create_pqr'
+    if '/checkPQR' in paths:
+        return 'check_pqr'
+    return 'faq'
+
+
+def build_capture(span_records, transcripts=None):
+    """Agrupa spans por correlation_id y genera los turnos de la captura"""
+    transcripts = transcripts or {}
+    turns = {}
+    actions = {}
+
+    for record in span_records:
+        correlation_id = record.get('correlation_id')
+        if not correlation_id:
+            continue
+        if record['span'] == 'agent_turn':
+            turns[correlation_id] = record
+        elif record['span'] == 'action':
+            actions.setdefault(correlation_id, []).append(record)
+
+    ordered = sorted(turns.values(), key=lambda turn: turn['start_ms'])
+    if not ordered:
+        return []
+    first_start = ordered[0]['start_ms']
+
+    capture = []
+    for turn in ordered:
+        correlation_id = turn['correlation_id']
+        invoke_started = turn.get('invoke_started_ms') or turn['start_ms']
+
+        turn_actions = []
+        for action in sorted(actions.get(correlation_id, []), key=lambda a: a['start_ms']):
+            api_path = action.get('api_path')
+            turn_actions.append({
+                'api_path': api_path,
+                'at_ms': max(0, action['start_ms'] - invoke_started),
+                'duration_ms': action['duration_ms'],
+                'parameters': dict(SANITIZED_PARAMETERS.get(api_path, {}))
+            })
+
+        first_chunk = turn.get('first_chunk_ms')
+        total_ms = turn['end_ms'] - invoke_started
+        transcript = transcripts.get(correlation_id, {})
+        capture.append({
+            'version': CAPTURE_VERSION,
+            'offset_ms': turn['start_ms'] - first_start,
+            'route': classify_route(turn_actions),
+            'session': anonymize_session(turn.get('session_id')),
+            'request': {
+                'message': sanitize_text(transcript.get('message', 'Mensaje capturado')),
+                'mode': turn.get('mode', 'sync')
+            },
+            'bedrock': {
+                'first_chunk_ms': (first_chunk - invoke_started) if first_chunk else total_ms,
+                'total_ms': total_ms,
+                'response_chars': len(transcript.get('response', '')) or 300
+            },
+            'actions': turn_actions
+        })
+
+    return capture
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description='Construye una captura sanitizada de tráfico de /agent')
+    parser.add_argument('span_logs', nargs='+', help='Exports de logs con registros de span')
+    parser.add_argument('--transcripts', help='Export JSON Lines de novi-transcripts-table (opcional)')
+    parser.add_argument('-o', '--output', default='-', help='Archivo de salida (por defecto stdout)')
+    args = parser.parse_args()
+
+    records = []
+    for path in args.span_logs:
+        records.extend(load_records(path))
+
+    capture = build_capture(records, load_transcripts(args.transcripts))
+
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    for turn in capture:
+        out.write(json.dumps(turn, ensure_ascii=False) + '\n')
+    if out is not sys.stdout:
+        out.close()
+
+    print(f"✅ Captura con {len(capture)} turnos", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Tests básicos para el control de admisión de /agent
+Siguiendo principio de simplicidad-first
+"""
+
+import json
+import sys
+import os
+import unittest
+from unittest.mock import patch, MagicMock
+
+# Agregar el directorio de lambda-functions al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda-functions'))
+
+# Importar el módulo a testear
+import admission
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+def _conditional_failure():
+    """ClientError equivalente a una condición de DynamoDB no cumplida"""
+    return ClientError(
+        {'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'Test'}},
+        'UpdateItem'
+    )
+
+class TestAdmission(unittest.TestCase):
+    """Tests básicos para admission"""
+
+    def setUp(self):
+        """Setup para cada test"""
+        # Limpiar estado en memoria entre tests
+        admission._local_buckets.clear()
+        admission._global_shed_until = 0.0
+
+    @patch('admission._get_table', return_value=None)
+    def test_session_burst_then_shed(self, mock_get_table):
+        """Test bucket local: admite el burst y rechaza el siguiente"""
+        for _ in range(admission.SESSION_BURST):
+            self.assertTrue(admission.admit('session-a')['admitted'])
+
+        decision = admission.admit('session-a')
+        self.assertFalse(decision['admitted'])
+        self.assertEqual(decision['reason'], 'session')
+        self.assertGreaterEqual(decision['retry_after'], 1)
+
+        # Otra sesión no se ve afectada
+        self.assertTrue(admission.admit('session-b')['admitted'])
+
+    @patch('admission._get_table')
+    def test_global_budget_exhausted(self, mock_get_table):
+        """Test rechazo por concurrencia global agotada en DynamoDB"""
+        mock_table = MagicMock()
+        mock_table.update_item.side_effect = [{}, _conditional_failure()]
+        # Sin leases vencidos que recuperar
+        mock_table.get_item.return_value = {'Item': {'leases': {'vigente': 4102444800}}}
+        mock_get_table.return_value = mock_table
+
+        decision = admission.admit('session-a')
+
+        self.assertFalse(decision['admitted'])
+        self.assertEqual(decision['reason'], 'global')
+
+        # El tier local recuerda la saturación y no vuelve a consultar DynamoDB
+        self.assertFalse(admission.admit('session-b')['admitted'])
+        self.assertEqual(mock_table.update_item.call_count, 2)
+
+    @patch('admission._get_table')
+    def test_release_lease(self, mock_get_table):
+        """Test que release elimina el lease reservado del item global"""
+        mock_table = MagicMock()
+        mock_get_table.return_value = mock_table
+
+        decision = admission.admit('session-a')
+        self.assertTrue(decision['admitted'])
+        lease_id = decision['lease']
+
+        admission.release(decision)
+
+        last_call = mock_table.update_item.call_args
+        self.assertEqual(last_call.kwargs['Key'], {'pk': admission.GLOBAL_LEASES_KEY})
+        self.assertEqual(last_call.kwargs['ExpressionAttributeNames'], {'#lease': lease_id})
+        self.assertIsNone(decision['lease'])
+
+    @patch('admission._get_table')
+    def test_expired_leases_are_reaped(self, mock_get_table):
+        """Test que un presupuesto lleno de leases vencidos se recupera y admite"""
+        mock_table = MagicMock()
+        mock_table.update_item.side_effect = [{}, _conditional_failure(), {}, {}]
+        mock_table.get_item.return_value = {'Item': {
+            'pk': admission.GLOBAL_LEASES_KEY,
+            'leases': {'leaked': 1, 'vigente': 4102444800}
+        }}
+        mock_get_table.return_value = mock_table
+
+        decision = admission.admit('session-a')
+
+        self.assertTrue(decision['admitted'])
+        reap_call = mock_table.update_item.call_args_list[2]
+        self.assertEqual(list(reap_call.kwargs['ExpressionAttributeNames'].values()), ['leaked'])
+
+    @patch('admission._get_table')
+    def test_global_key_is_fixed(self, mock_get_table):
+        """Test que el presupuesto global no depende del minuto en curso"""
+        mock_table = MagicMock()
+        mock_get_table.return_value = mock_table
+
+        with patch('admission.time.time', return_value=59.0):
+            admission.admit('session-a')
+        with patch('admission.time.time', return_value=61.0):
+            admission.admit('session-b')
+
+        global_keys = {call.kwargs['Key']['pk'] for call in mock_table.update_item.call_args_list
+                       if call.kwargs['Key']['pk'].startswith('global')}
+        self.assertEqual(global_keys, {admission.GLOBAL_LEASES_KEY})
+
+    @patch('admission._get_table')
+    def test_dynamodb_error_fails_open(self, mock_get_table):
+        """Test que un error de DynamoDB no bloquea la solicitud"""
+        mock_table = MagicMock()
+        mock_table.update_item.side_effect = ClientError(
+            {'Error': {'Code': 'InternalServerError', 'Message': 'Test'}},
+            'UpdateItem'
+        )
+        mock_get_table.return_value = mock_table
+
+        decision = admission.admit('session-a')
+
+        self.assertTrue(decision['admitted'])
+        self.assertIsNone(decision['lease'])
+
+    @patch('admission._get_table')
+    def test_connection_error_fails_open(self, mock_get_table):
+        """Test que un error de conexión con DynamoDB no escapa de admit ni de release"""
+        mock_table = MagicMock()
+        mock_table.update_item.side_effect = EndpointConnectionError(endpoint_url='https://dynamodb')
+        mock_get_table.return_value = mock_table
+
+        decision = admission.admit('session-a')
+        self.assertTrue(decision['admitted'])
+        self.assertIsNone(decision['lease'])
+
+        # Un lease reservado que no se puede liberar no rompe el turno ya servido
+        decision = {'admitted': True, 'lease': 'lease-1'}
+        admission.release(decision)
+        self.assertIsNone(decision['lease'])
+
+    @patch('invoke_agent.admission.admit')
+    def test_handler_returns_retry_after(self, mock_admit):
+        """Test que el handler responde 429 con Retry-After"""
+        import invoke_agent
+
+        mock_admit.return_value = {
+            'admitted': False, 'reason': 'session', 'retry_after': 3, 'lease': None
+        }
+        os.environ['BEDROCK_AGENT_ID'] = 'agent'
+        os.environ['BEDROCK_AGENT_ALIAS_ID'] = 'alias'
+
+        event = {'body': json.dumps({'message': 'Hola', 'session_id': 'session-a'})}
+
+        with patch('invoke_agent._invoke_agent_and_parse_stream') as mock_invoke:
+            result = invoke_agent.handler(event, {})
+            mock_invoke.assert_not_called()
+
+        self.assertEqual(result['statusCode'], 429)
+        self.assertEqual(result['headers']['Retry-After'], '3')
+
+if __name__ == '__main__':
+    print("Ejecutando tests para admission...")
+    unittest.main(verbosity=2)
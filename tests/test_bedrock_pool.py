@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Tests básicos para el pool multi-región de Bedrock
+Siguiendo principio de simplicidad-first
+"""
+
+import json
+import sys
+import os
+import unittest
+from unittest.mock import patch, MagicMock
+
+# Agregar el directorio de lambda-functions al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda-functions'))
+
+# Importar el módulo a testear
+import bedrock_pool
+from botocore.exceptions import ClientError
+
+TARGETS = [
+    {'region': 'us-west-2', 'agent_id': 'AGENTW', 'alias_id': 'ALIASW'},
+    {'region': 'us-east-1', 'agent_id': 'AGENTE', 'alias_id': 'ALIASE'}
+]
+
+def _throttling():
+    """ClientError de throttling de Bedrock"""
+    return ClientError(
+        {'Error': {'Code': 'ThrottlingException', 'Message': 'Test'}},
+        'InvokeAgent'
+    )
+
+class TestBedrockPool(unittest.TestCase):
+    """Tests básicos para bedrock_pool"""
+
+    def setUp(self):
+        """Setup para cada test"""
+        # Targets de prueba y estado limpio
+        os.environ['BEDROCK_TARGETS'] = json.dumps(TARGETS)
+        bedrock_pool._targets = None
+        bedrock_pool._sticky.clear()
+
+    def tearDown(self):
+        """Restaurar configuración de agente único"""
+        del os.environ['BEDROCK_TARGETS']
+        bedrock_pool._targets = None
+
+    @patch('bedrock_pool._get_client', return_value=MagicMock())
+    def test_failover_on_throttling(self, mock_client):
+        """Test failover al siguiente target si el preferido está throttled"""
+        attempts = []
+
+        def start(target, client):
+            attempts.append(target['region'])
+            if len(attempts) == 1:
+                raise _throttling()
+            return 'stream'
+
+        result = bedrock_pool.invoke('session-a', start, lambda response: 'ok')
+
+        self.assertEqual(result, 'ok')
+        self.assertEqual(len(attempts), 2)
+        self.assertNotEqual(attempts[0], attempts[1])
+        # La sesión queda asociada al target que respondió
+        self.assertTrue(bedrock_pool._sticky['session-a'].startswith(attempts[1]))
+
+    @patch('bedrock_pool._get_client', return_value=MagicMock())
+    def test_session_stickiness(self, mock_client):
+        """Test que una sesión en curso se mantiene en su target"""
+        regions = []
+
+        def start(target, client):
+            regions.append(target['region'])
+            return 'stream'
+
+        bedrock_pool.invoke('session-a', start, lambda response: 'ok')
+        # Otro target se vuelve mucho más rápido; la sesión no se mueve
+        for target in bedrock_pool.get_targets():
+            if target['region'] != regions[0]:
+                target['latency_ms'] = 1.0
+        bedrock_pool.invoke('session-a', start, lambda response: 'ok')
+
+        self.assertEqual(regions[0], regions[1])
+
+    @patch('bedrock_pool._get_client', return_value=MagicMock())
+    def test_latency_uses_time_to_first_event(self, mock_client):
+        """Test que el EWMA de ruteo mide la apertura del stream y no la duración del turno"""
+        used = []
+
+        def start(target, client):
+            used.append(target)
+            return 'stream'
+
+        def consume(response):
+            # Turno largo (tool calls / respuesta extensa) después del primer evento
+            bedrock_pool.time.sleep(0.3)
+            return 'ok'
+
+        bedrock_pool.invoke('session-a', start, consume)
+
+        expected_max = (1 - bedrock_pool.EWMA_ALPHA) * bedrock_pool.INITIAL_LATENCY_MS \
+            + bedrock_pool.EWMA_ALPHA * 100
+        self.assertLess(used[0]['latency_ms'], expected_max)
+
+    def test_ejection_after_errors(self):
+        """Test expulsión de un target tras errores consecutivos"""
+        target = bedrock_pool.get_targets()[0]
+        for _ in range(3):
+            bedrock_pool.record_result(target, 0, True)
+
+        now = bedrock_pool.time.time()
+        self.assertFalse(bedrock_pool._is_healthy(target, now))
+        candidates = bedrock_pool._candidates('session-new', now)
+        self.assertEqual(candidates[0]['region'], TARGETS[1]['region'])
+
+    @patch('bedrock_pool._get_client', return_value=MagicMock())
+    def test_no_failover_after_stream_started(self, mock_client):
+        """Test que un error durante el stream no se reintenta en otro target"""
+        start = MagicMock(return_value='stream')
+
+        def consume(response):
+            raise _throttling()
+
+        with self.assertRaises(ClientError):
+            bedrock_pool.invoke('session-a', start, consume)
+
+        start.assert_called_once()
+
+    @patch('bedrock_pool._get_client', return_value=MagicMock())
+    @patch('bedrock_pool._get_bindings_table')
+    def test_binding_shared_across_containers(self, mock_get_table, mock_client):
+        """Test que otro contenedor respeta el target persistido aunque sus scores difieran"""
+        bound = bedrock_pool.get_targets()[1]
+        mock_table = MagicMock()
+        mock_table.get_item.return_value = {'Item': {
+            'pk': 'binding#session-a', 'target': bound['key'],
+            'expires_at': int(bedrock_pool.time.time()) + bedrock_pool.SESSION_BINDING_TTL_SECONDS
+        }}
+        mock_get_table.return_value = mock_table
+        # En este contenedor el otro target es mucho más rápido
+        bedrock_pool.get_targets()[0]['latency_ms'] = 1.0
+
+        regions = []
+        bedrock_pool.invoke('session-a', lambda target, client: regions.append(target['region']), lambda r: 'ok')
+
+        self.assertEqual(regions, [bound['region']])
+        # La asociación vigente no se reescribe en cada turno
+        mock_table.put_item.assert_not_called()
+
+    @patch('bedrock_pool._get_client', return_value=MagicMock())
+    @patch('bedrock_pool._get_bindings_table')
+    def test_binding_persisted_for_new_session(self, mock_get_table, mock_client):
+        """Test que la primera respuesta persiste la asociación sesión -> target"""
+        mock_table = MagicMock()
+        mock_table.get_item.return_value = {}
+        mock_get_table.return_value = mock_table
+
+        bedrock_pool.invoke('session-b', lambda target, client: 'stream', lambda r: 'ok')
+
+        item = mock_table.put_item.call_args.kwargs['Item']
+        self.assertEqual(item['pk'], 'binding#session-b')
+        self.assertEqual(item['target'], bedrock_pool._sticky['session-b'])
+
+    def test_no_targets_configured(self):
+        """Test error de configuración explícito sin targets"""
+        bedrock_pool._targets = []
+        with self.assertRaises(bedrock_pool.PoolConfigurationError):
+            bedrock_pool.invoke('session-a', MagicMock(), MagicMock())
+
+if __name__ == '__main__':
+    print("Ejecutando tests para bedrock_pool...")
+    unittest.main(verbosity=2)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Tests básicos para el modo asíncrono (jobs) de /agent
+Siguiendo principio de simplicidad-first
+"""
+
+import json
+import sys
+import os
+import unittest
+from unittest.mock import patch, MagicMock
+
+# Agregar el directorio de lambda-functions al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda-functions'))
+
+# Importar la función a testear
+import invoke_agent
+import jobs
+from botocore.exceptions import ClientError
+
+ADMITTED = {'admitted': True, 'reason': 'ok', 'retry_after': 0, 'lease': 'global#1'}
+
+class FakeContext:
+    """Contexto Lambda mínimo con tiempo restante configurable"""
+
+    def __init__(self, remaining_ms):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_ms
+
+class TestJobs(unittest.TestCase):
+    """Tests básicos para jobs asíncronos"""
+
+    def setUp(self):
+        """Setup para cada test"""
+        # Mock de variables de entorno
+        os.environ['BEDROCK_AGENT_ID'] = 'agent'
+        os.environ['BEDROCK_AGENT_ALIAS_ID'] = 'alias'
+        invoke_agent._turn_ewma_ms = invoke_agent.TURN_ESTIMATE_MS
+
+    @patch('invoke_agent.admission.release')
+    @patch('invoke_agent.admission.admit', return_value=dict(ADMITTED))
+    @patch('invoke_agent.jobs')
+    def test_async_mode_returns_202(self, mock_jobs, mock_admit, mock_release):
+        """Test modo async explícito: responde 202 y cede el lease al worker"""
+        mock_jobs.is_enabled.return_value = True
+        mock_jobs.create_job.return_value = 'job-123'
+        mock_jobs.STATUS_PENDING = jobs.STATUS_PENDING
+
+        event = {'body': json.dumps({'message': 'Hola', 'session_id': 's-1', 'mode': 'async'})}
+        result = invoke_agent.handler(event, FakeContext(60000))
+
+        self.assertEqual(result['statusCode'], 202)
+        body = json.loads(result['body'])
+        self.assertEqual(body['job_id'], 'job-123')
+        self.assertEqual(result['headers']['Location'], '/agent/jobs/job-123')
+        mock_jobs.create_job.assert_called_once_with('s-1', 'Hola', 'global#1', body['correlation_id'], {})
+        self.assertIsNone(mock_release.call_args.args[0]['lease'])
+
+    @patch('jobs._get_lambda_client')
+    @patch('jobs._get_table')
+    def test_enqueue_failure_marks_job_error(self, mock_get_table, mock_get_lambda_client):
+        """Test que si falla la invocación Event el job queda en ERROR y no como 'error de Bedrock'"""
+        mock_table = MagicMock()
+        mock_get_table.return_value = mock_table
+        mock_get_lambda_client.return_value.invoke.side_effect = ClientError(
+            {'Error': {'Code': 'TooManyRequestsException', 'Message': 'Rate exceeded'}}, 'Invoke'
+        )
+
+        with patch('invoke_agent.admission.admit', return_value=dict(ADMITTED)), \
+                patch('invoke_agent.admission.release') as mock_release, \
+                patch.dict(os.environ, {'AWS_LAMBDA_FUNCTION_NAME': 'novi-invoke-agent'}):
+            event = {'body': json.dumps({'message': 'Hola', 'session_id': 's-1', 'mode': 'async'})}
+            with patch('invoke_agent.jobs.is_enabled', return_value=True):
+                result = invoke_agent.handler(event, FakeContext(60000))
+
+        self.assertEqual(result['statusCode'], 503)
+        self.assertNotIn('Bedrock', json.loads(result['body'])['error'])
+        failed = mock_table.update_item.call_args.kwargs['ExpressionAttributeValues']
+        self.assertEqual(failed[':s'], jobs.STATUS_ERROR)
+        # Sin worker, el lease se libera en la misma solicitud
+        self.assertEqual(mock_release.call_args.args[0]['lease'], 'global#1')
+
+    @patch('invoke_agent.jobs.is_enabled', return_value=True)
+    def test_auto_mode_switches_when_budget_low(self, mock_enabled):
+        """Test modo auto: síncrono con presupuesto amplio, async si es bajo"""
+        event = {'requestContext': {}}
+        self.assertFalse(invoke_agent._use_async_mode({}, event, FakeContext(60000)))
+        self.assertTrue(invoke_agent._use_async_mode({}, event, FakeContext(5000)))
+
+        # Turnos lentos observados también fuerzan el modo asíncrono
+        invoke_agent._record_turn_duration(200000)
+        self.assertTrue(invoke_agent._use_async_mode({}, event, FakeContext(60000)))
+        self.assertFalse(invoke_agent._use_async_mode({'mode': 'sync'}, event, FakeContext(60000)))
+
+    @patch('invoke_agent.admission.release')
+    @patch('invoke_agent._invoke_agent_and_parse_stream', return_value='Respuesta')
+    @patch('invoke_agent.jobs')
+    def test_worker_completes_job(self, mock_jobs, mock_invoke, mock_release):
+        """Test worker: guarda la respuesta y libera el lease"""
+        job = {'job_id': 'job-123', 'session_id': 's-1', 'message': 'Hola', 'lease': 'global#1'}
+        invoke_agent.handler({'novi_job': job}, FakeContext(60000))
+
+        mock_jobs.mark_running.assert_called_once_with('job-123', 60.0)
+        mock_jobs.complete_job.assert_called_once_with('job-123', 'Respuesta')
+        self.assertEqual(mock_release.call_args.args[0], {'lease': 'global#1'})
+
+    @patch('jobs._get_table')
+    def test_get_job_status(self, mock_get_table):
+        """Test GET /agent/jobs/{job_id} con job completado"""
+        mock_table = MagicMock()
+        mock_table.get_item.return_value = {'Item': {
+            'job_id': 'job-123', 'session_id': 's-1',
+            'status': jobs.STATUS_DONE, 'response': 'Respuesta'
+        }}
+        mock_get_table.return_value = mock_table
+
+        event = {'httpMethod': 'GET', 'pathParameters': {'job_id': 'job-123'},
+                 'queryStringParameters': {'wait': '10'}}
+        result = invoke_agent.handler(event, FakeContext(60000))
+
+        self.assertEqual(result['statusCode'], 200)
+        body = json.loads(result['body'])
+        self.assertEqual(body['response'], 'Respuesta')
+        mock_table.get_item.assert_called_once()
+
+    @patch('jobs._get_table')
+    def test_overdue_running_job_reported_as_error(self, mock_get_table):
+        """Test que un job EN_PROCESO cuyo worker expiró (timeout/caída) se reporta como ERROR"""
+        mock_table = MagicMock()
+        mock_table.get_item.return_value = {'Item': {
+            'job_id': 'job-123', 'session_id': 's-1',
+            'status': jobs.STATUS_RUNNING, 'deadline_at': 1000
+        }}
+        mock_get_table.return_value = mock_table
+
+        event = {'httpMethod': 'GET', 'pathParameters': {'job_id': 'job-123'},
+                 'queryStringParameters': {'wait': '10'}}
+        result = invoke_agent.handler(event, FakeContext(60000))
+
+        body = json.loads(result['body'])
+        self.assertEqual(body['status'], jobs.STATUS_ERROR)
+        self.assertIn('tiempo máximo', body['error']['error'])
+        # No espera el long-poll completo
+        mock_table.get_item.assert_called_once()
+
+    @patch('jobs._get_table')
+    def test_get_job_not_found(self, mock_get_table):
+        """Test job inexistente o expirado"""
+        mock_table = MagicMock()
+        mock_table.get_item.return_value = {}
+        mock_get_table.return_value = mock_table
+
+        event = {'httpMethod': 'GET', 'pathParameters': {'job_id': 'nope'}}
+        result = invoke_agent.handler(event, FakeContext(60000))
+
+        self.assertEqual(result['statusCode'], 404)
+
+if __name__ == '__main__':
+    print("Ejecutando tests para jobs...")
+    unittest.main(verbosity=2)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Tests básicos para el ciclo de vida (TTL + archivo frío) de las PQRs
+Siguiendo principio de simplicidad-first
+"""
+
+import gzip
+import io
+import json
+import sys
+import os
+import unittest
+from unittest.mock import patch, MagicMock
+
+# Agregar el directorio de lambda-functions al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda-functions'))
+
+# Importar las funciones a testear
+import pqr_lifecycle
+import pqr_archive
+import bedrock_actions
+from botocore.exceptions import ClientError
+
+ARCHIVED_PQR = {
+    'pqr_id': 'pqr_1700000000',
+    'customer_email': 'test@example.com',
+    'description': 'Pedido incompleto',
+    'status': 'CERRADA',
+    'created_at': '2023-11-14T22:13:20Z'
+}
+
+def _stream_image(item):
+    """Serializa un item al formato de imagen del stream de DynamoDB"""
+    return {key: {'S': value} for key, value in item.items()}
+
+class TestPqrLifecycle(unittest.TestCase):
+    """Tests básicos para pqr_lifecycle y pqr_archive"""
+
+    def setUp(self):
+        """Setup para cada test"""
+        # Mock de variables de entorno
+        os.environ['PQR_TABLE_NAME'] = 'test-table'
+        os.environ['REGION'] = 'us-west-2'
+        pqr_archive.ARCHIVE_BUCKET_NAME = 'test-archive'
+
+    def tearDown(self):
+        """Desactivar el archivo frío para los demás tests"""
+        pqr_archive.ARCHIVE_BUCKET_NAME = None
+
+    @patch('pqr_archive._get_s3')
+    @patch('pqr_lifecycle._get_table')
+    def test_resolved_pqr_gets_ttl(self, mock_get_table, mock_get_s3):
+        """Test que una PQR resuelta recibe expires_at con su copia fría ya escrita"""
+        calls = MagicMock()
+        mock_get_table.return_value = calls.table
+        mock_get_s3.return_value = calls.s3
+
+        event = {'Records': [{
+            'eventName': 'MODIFY',
+            'dynamodb': {'NewImage': _stream_image({'pqr_id': 'pqr_1', 'status': 'RESUELTA'})}
+        }]}
+        pqr_lifecycle.handler(event, {})
+
+        call = calls.table.update_item.call_args.kwargs
+        self.assertEqual(call['Key'], {'pqr_id': 'pqr_1'})
+        self.assertIn('SET expires_at', call['UpdateExpression'])
+
+        # La copia by-id se escribe antes del TTL, con el mismo expires_at
+        self.assertEqual([name for name, _, _ in calls.mock_calls],
+                         ['s3.put_object', 'table.update_item'])
+        copy_call = calls.s3.put_object.call_args.kwargs
+        self.assertEqual(copy_call['Key'], 'pqr-archive/by-id/pqr_1.json')
+        self.assertEqual(json.loads(copy_call['Body'])['expires_at'],
+                         call['ExpressionAttributeValues'][':exp'])
+
+    @patch('pqr_archive._get_s3')
+    def test_ttl_removal_is_archived(self, mock_get_s3):
+        """Test que los borrados por TTL se archivan comprimidos por día de creación"""
+        mock_s3 = MagicMock()
+        mock_get_s3.return_value = mock_s3
+
+        event = {'Records': [
+            {
+                'eventName': 'REMOVE',
+                'userIdentity': {'type': 'Service', 'principalId': 'dynamodb.amazonaws.com'},
+                'dynamodb': {'OldImage': _stream_image(ARCHIVED_PQR)}
+            },
+            {
+                # Borrado manual: no se archiva
+                'eventName': 'REMOVE',
+                'dynamodb': {'OldImage': _stream_image({'pqr_id': 'pqr_2', 'status': 'CREADA'})}
+            }
+        ]}
+        result = pqr_lifecycle.handler(event, {})
+
+        self.assertEqual(result['archived'], 1)
+        # Sólo el lote comprimido: la copia by-id ya existe desde que se asignó el TTL
+        mock_s3.put_object.assert_called_once()
+        batch_call = mock_s3.put_object.call_args.kwargs
+        self.assertTrue(batch_call['Key'].startswith('pqr-archive/created=2023-11-14/'))
+        lines = gzip.decompress(batch_call['Body']).decode('utf-8').splitlines()
+        self.assertEqual(json.loads(lines[0])['pqr_id'], 'pqr_1700000000')
+
+    @patch('pqr_archive._get_s3')
+    @patch('bedrock_actions.boto3')
+    def test_check_pqr_falls_back_to_archive(self, mock_boto3, mock_get_s3):
+        """Test que checkPQR busca en el archivo las PQRs que no están en la tabla"""
+        mock_table = MagicMock()
+        mock_table.get_item.return_value = {}
+        mock_boto3.resource.return_value.Table.return_value = mock_table
+
+        mock_s3 = MagicMock()
+        mock_s3.get_object.return_value = {
+            'Body': io.BytesIO(json.dumps(ARCHIVED_PQR).encode('utf-8'))
+        }
+        mock_get_s3.return_value = mock_s3
+
+        result = bedrock_actions.check_pqr({'pqr_id': 'pqr_1700000000'})
+
+        self.assertEqual(result['status'], 'CERRADA')
+        self.assertTrue(result['archived'])
+        # Un único GetObject por ID, sin listar la partición
+        mock_s3.get_object.assert_called_once_with(
+            Bucket='test-archive', Key='pqr-archive/by-id/pqr_1700000000.json'
+        )
+        mock_s3.get_paginator.assert_not_called()
+
+    @patch('pqr_archive._get_s3')
+    def test_archive_miss_returns_none(self, mock_get_s3):
+        """Test que una PQR inexistente en el archivo retorna None"""
+        mock_s3 = MagicMock()
+        mock_s3.get_object.side_effect = ClientError(
+            {'Error': {'Code': 'NoSuchKey', 'Message': 'Test'}}, 'GetObject'
+        )
+        mock_get_s3.return_value = mock_s3
+
+        self.assertIsNone(pqr_archive.find_pqr('pqr_1700000001'))
+        self.assertIsNone(pqr_archive.find_pqr('../otro'))
+        mock_s3.get_object.assert_called_once()
+
+if __name__ == '__main__':
+    print("Ejecutando tests para pqr_lifecycle...")
+    unittest.main(verbosity=2)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Tests básicos para la captura de tráfico usada por el replayer
+Siguiendo principio de simplicidad-first
+"""
+
+import sys
+import os
+import unittest
+
+# Agregar el directorio de scripts al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+# Importar el módulo a testear
+import traffic_capture
+
+def _span(name, correlation_id, start_ms, end_ms, **attrs):
+    """Registro de span como lo emite tracing.py"""
+    record = {'type': 'span', 'span': name, 'correlation_id': correlation_id,
+              'start_ms': start_ms, 'end_ms': end_ms, 'duration_ms': end_ms - start_ms}
+    record.update(attrs)
+    return record
+
+class TestTrafficCapture(unittest.TestCase):
+    """Tests básicos para traffic_capture"""
+
+    def test_sanitize_text(self):
+        """Test que se eliminan emails y números largos"""
+        text = traffic_capture.sanitize_text('Soy ana@correo.com, pedido 123456789')
+        self.assertNotIn('ana@correo.com', text)
+        self.assertNotIn('123456789', text)
+
+    def test_build_capture(self):
+        """Test agrupación de spans por turno con tiempos relativos y ruta"""
+        records = [
+            _span('agent_turn', 'c-2', 5000, 9000, session_id='s-1',
+                  invoke_started_ms=5010, first_chunk_ms=8500),
+            _span('agent_turn', 'c-1', 1000, 4000, session_id='s-1',
+                  invoke_started_ms=1010, first_chunk_ms=3800),
+            _span('action', 'c-2', 6010, 6100, api_path='/createPQR')
+        ]
+        transcripts = {'c-2': {'message': 'Mi email es ana@correo.com', 'response': 'Listo'}}
+
+        capture = traffic_capture.build_capture(records, transcripts)
+
+        self.assertEqual([turn['offset_ms'] for turn in capture], [0, 4000])
+        self.assertEqual(capture[0]['route'], 'faq')
+        self.assertEqual(capture[1]['route'], 'create_pqr')
+        self.assertEqual(capture[1]['actions'][0]['at_ms'], 1000)
+        self.assertEqual(capture[1]['bedrock']['first_chunk_ms'], 3490)
+        self.assertEqual(capture[1]['bedrock']['response_chars'], 5)
+        self.assertNotIn('ana@correo.com', capture[1]['request']['message'])
+        self.assertNotEqual(capture[0]['session'], 's-1')
+
+if __name__ == '__main__':
+    print("Ejecutando tests para traffic_capture...")
+    unittest.main(verbosity=2)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests básicos para la persistencia de transcripciones en lote
+Siguiendo principio de simplicidad-first
+"""
+
+import sys
+import os
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+
+# Agregar el directorio de lambda-functions al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda-functions'))
+
+# Importar el módulo a testear
+import transcripts
+
+class TestTranscripts(unittest.TestCase):
+    """Tests básicos para transcripts"""
+
+    def setUp(self):
+        """Setup para cada test"""
+        # Tabla configurada y buffer limpio
+        transcripts.TRANSCRIPTS_TABLE_NAME = 'test-transcripts'
+        transcripts._buffer.clear()
+        transcripts.DROP_POLICY = 'drop_oldest'
+        transcripts.MAX_BUFFERED_TURNS = 500
+
+    def tearDown(self):
+        """Desactivar transcripciones para los demás tests"""
+        transcripts.TRANSCRIPTS_TABLE_NAME = None
+        transcripts._buffer.clear()
+
+    @patch('transcripts._get_table')
+    def test_record_does_not_write(self, mock_get_table):
+        """Test que record sólo encola en memoria"""
+        transcripts.record('s-1', 'c-1', 'Hola', 'Respuesta', {'duration_ms': 1200})
+
+        mock_get_table.assert_not_called()
+        self.assertEqual(len(transcripts._buffer), 1)
+
+    @patch('transcripts._get_table')
+    def test_flush_writes_batch(self, mock_get_table):
+        """Test que flush escribe todos los turnos en un batch_writer"""
+        mock_batch = MagicMock()
+        mock_get_table.return_value.batch_writer.return_value.__enter__.return_value = mock_batch
+
+        for i in range(3):
+            transcripts.record('s-1', f"c-{i}", 'Hola', 'Respuesta', {})
+        flushed = transcripts.flush()
+
+        self.assertEqual(flushed, 3)
+        self.assertEqual(mock_batch.put_item.call_count, 3)
+        self.assertEqual(len(transcripts._buffer), 0)
+
+    def test_drop_policies(self):
+        """Test límite de memoria con drop_oldest y drop_newest"""
+        transcripts.MAX_BUFFERED_TURNS = 2
+        for i in range(3):
+            transcripts.record('s-1', f"c-{i}", 'Hola', 'Respuesta', {})
+        self.assertEqual([item['correlation_id'] for item in transcripts._buffer], ['c-1', 'c-2'])
+
+        transcripts._buffer.clear()
+        transcripts.DROP_POLICY = 'drop_newest'
+        for i in range(3):
+            transcripts.record('s-1', f"c-{i}", 'Hola', 'Respuesta', {})
+        self.assertEqual([item['correlation_id'] for item in transcripts._buffer], ['c-0', 'c-1'])
+
+    @patch('transcripts._get_table')
+    def test_failed_flush_keeps_turns(self, mock_get_table):
+        """Test que un error de escritura devuelve los turnos al buffer"""
+        mock_get_table.return_value.batch_writer.side_effect = Exception('DynamoDB error')
+        transcripts.record('s-1', 'c-1', 'Hola', 'Respuesta', {})
+
+        self.assertEqual(transcripts.flush(), 0)
+        self.assertEqual(len(transcripts._buffer), 1)
+
+    def test_record_overhead(self):
+        """Test que el costo de record en el camino de respuesta es despreciable"""
+        transcripts.MAX_BUFFERED_TURNS = 100000
+        durations = []
+        for i in range(2000):
+            started = time.perf_counter()
+            transcripts.record('s-1', f"c-{i}", 'Hola' * 50, 'Respuesta' * 200, {'duration_ms': 1000})
+            durations.append(time.perf_counter() - started)
+
+        durations.sort()
+        p99_ms = durations[int(len(durations) * 0.99)] * 1000
+        self.assertLess(p99_ms, 1.0)
+
+if __name__ == '__main__':
+    print("Ejecutando tests para transcripts...")
+    unittest.main(verbosity=2)
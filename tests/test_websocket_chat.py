@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Tests básicos para el chat WebSocket y el push de estado de PQRs
+Siguiendo principio de simplicidad-first
+"""
+
+import json
+import sys
+import os
+import unittest
+from unittest.mock import patch
+from boto3.dynamodb.types import TypeSerializer
+
+# Agregar el directorio de lambda-functions al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda-functions'))
+
+os.environ.setdefault('BEDROCK_AGENT_ID', 'test-agent')
+os.environ.setdefault('BEDROCK_AGENT_ALIAS_ID', 'test-alias')
+
+# Importar los módulos a testear
+import websocket_authorizer
+import websocket_chat
+import pqr_status_push
+from botocore.exceptions import ClientError
+
+ENDPOINT = 'https://abc.execute-api.us-west-2.amazonaws.com/prod'
+
+SECRET = b'test-secret'
+
+def _ws_event(route_key, body=None, query=None, authorizer=None):
+    """Evento mínimo de API Gateway WebSocket"""
+    return {
+        'requestContext': {
+            'routeKey': route_key,
+            'connectionId': 'conn-1=',
+            'domainName': 'abc.execute-api.us-west-2.amazonaws.com',
+            'stage': 'prod',
+            'authorizer': authorizer
+        },
+        'queryStringParameters': query,
+        'body': json.dumps(body) if body is not None else None
+    }
+
+def _stream_record(old_status, new_status):
+    """Registro MODIFY del stream de PqrTable"""
+    serializer = TypeSerializer()
+    image = lambda status: {key: serializer.serialize(value) for key, value in {
+        'pqr_id': 'PQR-1', 'status': status, 'customer_email': 'ana@correo.com'
+    }.items()}
+    return {'eventName': 'MODIFY', 'dynamodb': {'OldImage': image(old_status), 'NewImage': image(new_status)}}
+
+class TestWebSocketChat(unittest.TestCase):
+    """Tests básicos para websocket_chat y pqr_status_push"""
+
+    @patch('websocket_chat.connections.register')
+    def test_connect_registers_authenticated_email(self, mock_register):
+        """Test que $connect registra la conexión con el email del authorizer"""
+        result = websocket_chat.handler(
+            _ws_event('$connect', query={'session_id': 's-1'}, authorizer={'email': 'ana@correo.com'}), None
+        )
+
+        self.assertEqual(result['statusCode'], 200)
+        mock_register.assert_called_once_with('conn-1=', 's-1', 'ana@correo.com')
+
+    @patch('websocket_chat.connections.register')
+    def test_connect_ignores_query_email(self, mock_register):
+        """Test que un email sólo en la query no se indexa (no recibe pushes de otro cliente)"""
+        websocket_chat.handler(
+            _ws_event('$connect', query={'session_id': 's-1', 'customer_email': 'victima@correo.com'}), None
+        )
+
+        mock_register.assert_called_once_with('conn-1=', 's-1', None)
+
+    def test_authorizer_tokens(self):
+        """Test authorizer: token válido expone el email; inválido se rechaza; sin token es anónimo"""
+        arn = 'arn:aws:execute-api:us-west-2:123:abc/prod/$connect'
+        token = websocket_authorizer.issue_token('ana@correo.com', secret=SECRET)
+
+        with patch('websocket_authorizer._get_secret', return_value=SECRET):
+            valid = websocket_authorizer.handler({'methodArn': arn, 'queryStringParameters': {'token': token}}, None)
+            tampered = websocket_authorizer.handler(
+                {'methodArn': arn, 'queryStringParameters': {'token': token[:-2] + 'xx'}}, None
+            )
+            anonymous = websocket_authorizer.handler({'methodArn': arn}, None)
+
+        self.assertEqual(valid['policyDocument']['Statement'][0]['Effect'], 'Allow')
+        self.assertEqual(valid['context']['email'], 'ana@correo.com')
+        self.assertEqual(tampered['policyDocument']['Statement'][0]['Effect'], 'Deny')
+        self.assertEqual(anonymous['policyDocument']['Statement'][0]['Effect'], 'Allow')
+        self.assertNotIn('context', anonymous)
+
+        expired = websocket_authorizer.issue_token('ana@correo.com', ttl_seconds=-1, secret=SECRET)
+        self.assertIsNone(websocket_authorizer.verify_token(expired, secret=SECRET))
+
+    @patch('websocket_chat.connections.remove')
+    def test_disconnect_removes_connection(self, mock_remove):
+        """Test que $disconnect elimina la conexión del registro"""
+        websocket_chat.handler(_ws_event('$disconnect'), None)
+        mock_remove.assert_called_once_with('conn-1=')
+
+    @patch('websocket_chat.admission.release')
+    @patch('websocket_chat.admission.admit')
+    @patch('websocket_chat.invoke_agent.run_turn')
+    @patch('websocket_chat.connections.send')
+    @patch('websocket_chat.connections.get')
+    def test_message_reuses_turn_and_replies(self, mock_get, mock_send, mock_run_turn, mock_admit, mock_release):
+        """Test que un mensaje usa la sesión registrada y responde por la conexión"""
+        mock_get.return_value = {'connection_id': 'conn-1=', 'session_id': 's-1', 'customer_email': 'ana@correo.com'}
+        mock_admit.return_value = {'admitted': True, 'reason': None, 'retry_after': 0, 'lease': None}
+        mock_run_turn.return_value = 'Hola, soy Novi'
+
+        websocket_chat.handler(_ws_event('$default', {'message': 'Hola', 'correlation_id': 'c-1'}), None)
+
+        mock_run_turn.assert_called_once_with(
+            's-1', 'Hola', 'c-1', 'websocket', {'customer_email': 'ana@correo.com'}
+        )
+        endpoint, connection_id, payload = mock_send.call_args[0]
+        self.assertEqual((endpoint, connection_id), (ENDPOINT, 'conn-1='))
+        self.assertEqual(payload['type'], 'agent_response')
+        self.assertEqual(payload['response'], 'Hola, soy Novi')
+        mock_release.assert_called_once()
+
+    @patch('websocket_chat.admission.release')
+    @patch('websocket_chat.admission.admit')
+    @patch('websocket_chat.invoke_agent.run_turn', return_value='Hola')
+    @patch('websocket_chat.connections.send')
+    @patch('websocket_chat.connections.get', return_value={'session_id': 's-1'})
+    def test_reply_failure_not_reported_as_bedrock_error(self, mock_get, mock_send, mock_run_turn,
+                                                         mock_admit, mock_release):
+        """Test que un fallo al enviar la respuesta no se reporta como error de Bedrock ni rompe el handler"""
+        mock_admit.return_value = {'admitted': True, 'reason': 'ok', 'retry_after': 0, 'lease': None}
+        mock_send.side_effect = ClientError(
+            {'Error': {'Code': 'LimitExceededException', 'Message': 'Test'}}, 'PostToConnection'
+        )
+
+        result = websocket_chat.handler(_ws_event('$default', {'message': 'Hola'}), None)
+
+        self.assertEqual(result['statusCode'], 200)
+        mock_send.assert_called_once()
+        self.assertEqual(mock_send.call_args[0][2]['type'], 'agent_response')
+        mock_release.assert_called_once()
+
+    @patch('websocket_chat.admission.admit')
+    @patch('websocket_chat.invoke_agent.run_turn')
+    @patch('websocket_chat.connections.send')
+    @patch('websocket_chat.connections.get')
+    def test_message_rejected_by_admission(self, mock_get, mock_send, mock_run_turn, mock_admit):
+        """Test que una sesión limitada recibe error con retry_after sin invocar al agente"""
+        mock_get.return_value = {'connection_id': 'conn-1=', 'session_id': 's-1'}
+        mock_admit.return_value = {'admitted': False, 'reason': 'session_rate', 'retry_after': 3, 'lease': None}
+
+        websocket_chat.handler(_ws_event('$default', {'message': 'Hola'}), None)
+
+        mock_run_turn.assert_not_called()
+        payload = mock_send.call_args[0][2]
+        self.assertEqual(payload['type'], 'error')
+        self.assertEqual(payload['retry_after'], 3)
+
+    @patch('pqr_status_push.connections.send')
+    @patch('pqr_status_push.connections.find_by_customer')
+    def test_status_change_pushed_to_customer(self, mock_find, mock_send):
+        """Test que un cambio de estado se envía a las conexiones del cliente"""
+        mock_find.return_value = [{'connection_id': 'conn-1='}, {'connection_id': 'conn-2='}]
+        mock_send.return_value = True
+
+        result = pqr_status_push.handler({'Records': [
+            _stream_record('CREADA', 'EN_PROCESO'),
+            _stream_record('EN_PROCESO', 'EN_PROCESO')
+        ]}, None)
+
+        self.assertEqual(result['pushed'], 2)
+        mock_find.assert_called_once_with('ana@correo.com')
+        payload = mock_send.call_args[0][2]
+        self.assertEqual(payload['type'], 'pqr_status')
+        self.assertEqual(payload['status'], 'EN_PROCESO')
+        self.assertEqual(payload['previous_status'], 'CREADA')
+
+if __name__ == '__main__':
+    print("Ejecutando tests para websocket_chat...")
+    unittest.main(verbosity=2)